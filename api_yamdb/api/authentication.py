@@ -0,0 +1,101 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import Roles, User
+
+
+def user_state_key(user_id):
+    return f'user_state:{user_id}'
+
+
+def user_state_timeout():
+    return int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+
+
+def access_token_for(user):
+    """Токен доступа с ролью пользователя в утверждениях."""
+    token = AccessToken.for_user(user)
+    token['role'] = user.role
+    token['is_staff'] = user.is_staff
+    return token
+
+
+def publish_user_state(user, deleted=False):
+    """
+    Записывает в кэш роль и активность пользователя после фиксации
+    транзакции, чтобы они сразу действовали для выданных ему токенов.
+    """
+    key = user_state_key(user.pk)
+    state = {
+        'role': user.role,
+        'is_staff': user.is_staff,
+        'is_active': user.is_active and not deleted,
+    }
+    transaction.on_commit(
+        lambda: cache.set(key, state, user_state_timeout())
+    )
+
+
+def get_user_state(user_id):
+    """
+    Роль и активность пользователя из кэша, а если их там нет
+    (запись вытеснена или ещё не создана) — из базы данных.
+    Удалённый пользователь неактивен. Прочитанное из базы добавляется
+    в кэш, только если publish_user_state() не записал его раньше.
+    """
+    key = user_state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = User.objects.filter(pk=user_id).values(
+            'role', 'is_staff', 'is_active'
+        ).first() or {'role': None, 'is_staff': False, 'is_active': False}
+        cache.add(key, state, user_state_timeout())
+    return state
+
+
+class ClaimsUser(TokenUser):
+    """
+    Пользователь, построенный по токену и состоянию из get_user_state()
+    без загрузки модели. Достаточен для проверки прав и сохранения
+    объектов по author_id.
+    """
+
+    def __init__(self, token, state):
+        super().__init__(token)
+        self.role = state['role']
+        self.is_staff = state['is_staff']
+
+    @property
+    def is_admin(self):
+        return self.role == Roles.ADMIN or self.is_staff
+
+    @property
+    def is_moderator(self):
+        return self.role == Roles.MODERATOR
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT без загрузки пользователя из базы.
+    Роль и активность берутся из общего кэша get_user_state(): при
+    промахе они читаются из базы, поэтому роль в утверждениях токена
+    никогда не принимается без проверки. Токены без роли в утверждениях
+    проверяются по базе, как в JWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        if 'role' not in validated_token:
+            return super().get_user(validated_token)
+        state = get_user_state(
+            validated_token[api_settings.USER_ID_CLAIM]
+        )
+        if not state['is_active']:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        return ClaimsUser(validated_token, state)
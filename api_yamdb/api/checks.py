@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core import checks
+
+PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register(checks.Tags.caches)
+def shared_cache_check(app_configs, **kwargs):
+    """
+    Версии данных, состояние пользователей и счётчики лимитов должны
+    быть видны всем процессам, поэтому кэш должен быть общим.
+    """
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_CACHES:
+        return []
+    return [checks.Warning(
+        'Кэш по умолчанию хранится в памяти процесса: воркеры, mailer '
+        'и deleter не увидят изменений друг друга.',
+        hint='Укажите общий кэш в CACHE_BACKEND и CACHE_LOCATION '
+             '(например, memcached) или запускайте один процесс.',
+        id='api.W001',
+    )]
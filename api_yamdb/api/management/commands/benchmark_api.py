@@ -0,0 +1,295 @@
+import math
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import count
+
+from api.authentication import access_token_for, user_state_key
+from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
+                       LeaderboardViewSet, ReviewViewSet, TitleViewSet)
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from reviews.cache import set_versions
+from reviews.models import Review, Title
+from users.models import Roles, User
+
+Scenario = namedtuple('Scenario', ('name', 'method', 'url', 'data', 'auth'))
+
+CACHED_VIEWS = (
+    CategoryViewSet, GenreViewSet, TitleViewSet, ReviewViewSet,
+    CommentViewSet, LeaderboardViewSet,
+)
+
+
+def cold_version_names():
+    """
+    Версии, под которыми кэшируются ответы эндпоинтов и справочники.
+    Версии отдельных объектов ('reviews.title:{pk}') не нужны: общая
+    версия набора тоже входит в ключ ответа.
+    """
+    return sorted({
+        name
+        for view in CACHED_VIEWS
+        for name in view.version_names + (view.detail_version_names or ())
+        if '{' not in name
+    })
+
+
+def percentile(values, share):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(share * len(ordered)) - 1, 0)]
+
+
+class RollbackBenchmarkError(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Замер производительности эндпоинтов API на текущей базе данных.
+    Запросы выполняются в процессе тестовым клиентом Django, поэтому
+    доступно число SQL-запросов. Все изменения данных откатываются.
+    Пропускная способность — число запросов, делённое на время всего
+    прогона сценария, в том числе в несколько потоков (--concurrency).
+    """
+    help = "Benchmarks API endpoints: latency percentiles, throughput " \
+           "and SQL query counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Requests per scenario',
+        )
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            help='Run only scenarios whose name contains one of the values',
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Invalidate cached responses, dictionaries and user state '
+                 'before every request',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Threads sending requests at once; above 1 only anonymous '
+                 'read scenarios run',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError(
+                '--requests and --concurrency must be positive'
+            )
+        title = Title.objects.order_by('-reviews_count').first()
+        review = Review.objects.filter(title=title).first()
+        if review is None:
+            raise CommandError(
+                'Seed the database first (generate_data_files and '
+                'load_data_files)'
+            )
+        self.sequence = count()
+        self.cold_versions = cold_version_names()
+        self.stdout.write(
+            f'{"scenario":<28}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}'
+            f'{"req/s":>9}{"queries":>9}'
+        )
+        try:
+            with transaction.atomic(), self.unlimited_throttles():
+                self.prepare_users()
+                for scenario in self.get_scenarios(title, review):
+                    if self.selected(scenario, options):
+                        self.run(scenario, options)
+                raise RollbackBenchmarkError
+        except RollbackBenchmarkError:
+            pass
+
+    def unlimited_throttles(self):
+        """
+        Лимиты частоты запросов поднимаются так, чтобы не срабатывать,
+        но проверка лимитов по-прежнему входит в замер.
+        """
+        rest_framework = settings.REST_FRAMEWORK
+        return override_settings(REST_FRAMEWORK={
+            **rest_framework,
+            'DEFAULT_THROTTLE_RATES': {
+                scope: f'{10 ** 9}/day'
+                for scope in rest_framework['DEFAULT_THROTTLE_RATES']
+            },
+        })
+
+    def selected(self, scenario, options):
+        """
+        Сценарий выбран в --only. Потоки работают со своими соединениями
+        вне откатываемой транзакции и не видят созданных в ней
+        пользователей, поэтому при --concurrency больше 1 изменяющие
+        и авторизованные сценарии пропускаются.
+        """
+        if options['concurrency'] > 1 and (
+            scenario.method != 'get' or scenario.auth
+        ):
+            return False
+        only = options['only']
+        return not only or any(name in scenario.name for name in only)
+
+    def prepare_users(self):
+        self.admin = User.objects.create(
+            username='benchmark_admin',
+            email='benchmark_admin@yamdb.fake',
+            role=Roles.ADMIN,
+        )
+        self.user = User.objects.create(
+            username='benchmark_user', email='benchmark_user@yamdb.fake'
+        )
+        self.tokens = {
+            'admin': f'Bearer {access_token_for(self.admin)}',
+            'user': f'Bearer {access_token_for(self.user)}',
+        }
+
+    def get_scenarios(self, title, review):
+        titles = '/api/v1/titles/'
+        reviews = f'{titles}{title.id}/reviews/'
+        comments = f'{reviews}{review.id}/comments/'
+        last_page = max(math.ceil(title.reviews_count / 10), 1)
+        genre = title.genre.first()
+        return (
+            Scenario('titles list', 'get', titles, None, None),
+            Scenario(
+                'titles filtered', 'get', titles, {
+                    'category': title.category.slug if title.category else '',
+                    'genre': genre.slug if genre else '',
+                    'year': title.year,
+                }, None
+            ),
+            Scenario(
+                'titles search', 'get', titles,
+                {'search': title.name.split()[0]}, None
+            ),
+            Scenario('title detail', 'get', f'{titles}{title.id}/', None,
+                     None),
+            Scenario('categories list', 'get', '/api/v1/categories/', None,
+                     None),
+            Scenario('genres list', 'get', '/api/v1/genres/', None, None),
+            Scenario('reviews first page', 'get', reviews, None, None),
+            Scenario('reviews last page', 'get', reviews,
+                     {'page': last_page}, None),
+            Scenario('reviews cursor page', 'get', reviews,
+                     {'pagination': 'cursor'}, None),
+            Scenario('review detail', 'get', f'{reviews}{review.id}/', None,
+                     None),
+            Scenario('comments list', 'get', comments, None, None),
+            Scenario('comment create', 'post', comments,
+                     lambda: {'text': 'Комментарий'}, 'user'),
+            Scenario('users list', 'get', '/api/v1/users/', None, 'admin'),
+            Scenario('users me', 'get', '/api/v1/users/me/', None, 'user'),
+            Scenario('auth signup', 'post', '/api/v1/auth/signup/',
+                     self.signup_data, None),
+            Scenario('auth token', 'post', '/api/v1/auth/token/',
+                     self.token_data, None),
+        )
+
+    def signup_data(self):
+        number = next(self.sequence)
+        return {
+            'username': f'benchmark_{number}',
+            'email': f'benchmark_{number}@yamdb.fake',
+        }
+
+    def token_data(self):
+        return {
+            'username': self.user.username,
+            'confirmation_code': default_token_generator.make_token(
+                self.user
+            ),
+        }
+
+    def request(self, client, scenario):
+        data = scenario.data() if callable(scenario.data) else scenario.data
+        headers = {}
+        if scenario.auth:
+            headers['HTTP_AUTHORIZATION'] = self.tokens[scenario.auth]
+        if scenario.method == 'get':
+            return client.get(scenario.url, data, **headers)
+        return client.post(
+            scenario.url, data, content_type='application/json', **headers
+        )
+
+    def run(self, scenario, options):
+        concurrency = options['concurrency']
+        requests = [
+            options['requests'] // concurrency
+            + (number < options['requests'] % concurrency)
+            for number in range(concurrency)
+        ]
+        started = time.perf_counter()
+        if concurrency == 1:
+            results = [self.measure(scenario, options, requests[0])]
+        else:
+            with ThreadPoolExecutor(concurrency) as executor:
+                results = list(executor.map(
+                    partial(self.measure_in_thread, scenario, options),
+                    requests,
+                ))
+        elapsed = time.perf_counter() - started
+        latencies = [
+            latency for worker, _ in results for latency in worker
+        ]
+        queries = sum(worker for _, worker in results)
+        self.stdout.write(
+            f'{scenario.name:<28}'
+            f'{percentile(latencies, 0.5) * 1000:>9.2f}'
+            f'{percentile(latencies, 0.95) * 1000:>9.2f}'
+            f'{percentile(latencies, 0.99) * 1000:>9.2f}'
+            f'{len(latencies) / elapsed:>9.0f}'
+            f'{queries / len(latencies):>9.1f}'
+        )
+
+    def measure_in_thread(self, scenario, options, requests):
+        try:
+            return self.measure(scenario, options, requests)
+        finally:
+            connection.close()
+
+    def make_cold(self):
+        """
+        Сбрасывает кэш, которым пользуются сценарии: меняет версии
+        наборов данных и удаляет состояние пользователей бенчмарка.
+        Остальные записи общего кэша, например счётчики ограничения
+        частоты запросов, не затрагиваются.
+        """
+        set_versions(self.cold_versions)
+        cache.delete_many([
+            user_state_key(user.pk) for user in (self.admin, self.user)
+        ])
+
+    def measure(self, scenario, options, requests):
+        """Задержки запросов сценария и суммарное число SQL-запросов."""
+        client = Client(HTTP_HOST='localhost')
+        latencies = []
+        queries = 0
+        for _ in range(requests):
+            if options['cold']:
+                self.make_cold()
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = self.request(client, scenario)
+                latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                raise CommandError(
+                    f'{scenario.name}: {response.status_code} '
+                    f'{response.content[:200]}'
+                )
+            queries += len(context.captured_queries)
+        return latencies, queries
@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import prometheus_client
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from prometheus_client import multiprocess
+from rest_framework import serializers
+
+from api_yamdb.db.pool import render_metrics as pool_metrics
+
+logger = logging.getLogger(__name__)
+
+current_request = ContextVar('current_request', default=None)
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000)
+
+
+class RequestMetrics:
+    """Метрики одного запроса: SQL-запросы, время в базе и сериализации."""
+
+    def __init__(self, collect_sql=False):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.collect_sql = collect_sql
+        self.sql = Counter()
+        self._timers = 0
+        self.started = time.perf_counter()
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            if self.collect_sql:
+                self.sql[fingerprint(sql)] += 1
+
+
+@contextmanager
+def timer(name):
+    """
+    Учитывает время выполнения блока в метрике name текущего запроса.
+    Вложенные замеры не суммируются с внешними.
+    """
+    record = current_request.get()
+    if record is None or record._timers:
+        yield
+        return
+    record._timers += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record._timers -= 1
+        setattr(
+            record, f'{name}_time',
+            getattr(record, f'{name}_time') + time.perf_counter() - started
+        )
+
+
+def fingerprint(sql):
+    """Отпечаток запроса: списки параметров IN сворачиваются."""
+    sql = re.sub(r'IN \((?:%s, )*%s\)', 'IN (...)', sql)
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка выполнения SQL: учитывает запрос в метриках текущего запроса."""
+    record = current_request.get()
+    if record is None:
+        return execute(sql, params, many, context)
+    return record.execute(execute, sql, params, many, context)
+
+
+def instrument(connection):
+    """Один раз подключает record_query к соединению с базой данных."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    instrument(connection)
+
+
+class MetricsRegistry:
+    """
+    Метрики запросов по представлениям на prometheus_client.
+    Под gunicorn переменная PROMETHEUS_MULTIPROC_DIR включает
+    многопроцессный режим: каждый воркер пишет значения в свой файл
+    в этом каталоге, а render() складывает файлы всех воркеров, поэтому
+    любой воркер отдаёт метрики всего сервера.
+    Дополнительные источники метрик добавляются в collectors:
+    функции, возвращающие строки в текстовом формате Prometheus.
+    """
+    histograms = (
+        ('yamdb_request_duration_seconds', 'duration', DURATION_BUCKETS),
+        ('yamdb_request_queries', 'queries', QUERY_BUCKETS),
+        ('yamdb_request_db_duration_seconds', 'db_time', DURATION_BUCKETS),
+        ('yamdb_request_serializer_duration_seconds', 'serializer_time',
+         DURATION_BUCKETS),
+        ('yamdb_response_size_bytes', 'size', SIZE_BUCKETS),
+    )
+
+    def __init__(self):
+        self.registry = prometheus_client.CollectorRegistry()
+        self.requests = prometheus_client.Counter(
+            'yamdb_requests', 'Requests by view and status',
+            ('view', 'status'), registry=self.registry,
+        )
+        self.metrics = {
+            key: prometheus_client.Histogram(
+                name, f'Request {key} by view', ('view',),
+                buckets=buckets, registry=self.registry,
+            )
+            for name, key, buckets in self.histograms
+        }
+        self.collectors = []
+
+    def observe(self, view, status, values):
+        for key, histogram in self.metrics.items():
+            histogram.labels(view).observe(values[key])
+        self.requests.labels(view, status).inc()
+
+    def render(self):
+        registry = self.registry
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = prometheus_client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        lines = [
+            prometheus_client.generate_latest(registry).decode().rstrip('\n')
+        ]
+        for collector in self.collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+registry.collectors.append(pool_metrics)
+
+
+def get_view_name(request):
+    """Имя представления и действия, например TitleViewSet.list."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view = getattr(match.func, 'cls', None)
+    if view is None:
+        return f'{match.func.__module__}.{match.func.__name__}'
+    method = request.method.lower()
+    action = (getattr(match.func, 'actions', None) or {}).get(method, method)
+    return f'{view.__name__}.{action}'
+
+
+class MetricsMiddleware:
+    """
+    Собирает для каждого запроса время ответа, число SQL-запросов,
+    время в базе данных и в сериализаторах, размер ответа.
+    Медленные запросы пишутся в лог вместе с отпечатками SQL.
+    Работает и под WSGI, и под ASGI: запросы к базе учитываются
+    в любом потоке, куда контекст запроса передан через asgiref.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        for connection in connections.all():
+            instrument(connection)
+        record, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.finish(request, response, record)
+        return response
+
+    async def __acall__(self, request):
+        record, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.finish(request, response, record)
+        return response
+
+    def start(self):
+        record = RequestMetrics(
+            collect_sql=bool(settings.SLOW_REQUEST_THRESHOLD)
+        )
+        return record, current_request.set(record)
+
+    def finish(self, request, response, record):
+        duration = time.perf_counter() - record.started
+        view = get_view_name(request)
+        registry.observe(view, response.status_code, {
+            'duration': duration,
+            'queries': record.queries,
+            'db_time': record.db_time,
+            'serializer_time': record.serializer_time,
+            'size': 0 if response.streaming else len(response.content),
+        })
+        slow_threshold = settings.SLOW_REQUEST_THRESHOLD
+        if slow_threshold and duration >= slow_threshold:
+            logger.warning(
+                'Slow request %s %s (%s): %.3fs, %d queries, %.3fs in db\n%s',
+                request.method, request.get_full_path(), view, duration,
+                record.queries, record.db_time,
+                '\n'.join(
+                    f'{count} x {sql}'
+                    for sql, count in record.sql.most_common(10)
+                ),
+            )
+
+
+class TimedSerializerMixin:
+    """Учитывает время сериализации в метриках запроса."""
+
+    @property
+    def data(self):
+        with timer('serializer'):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
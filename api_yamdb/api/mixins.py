@@ -1,7 +1,27 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, update_wrapper
+from hashlib import md5
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag, urlencode
 from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.mixins import (CreateModelMixin, DestroyModelMixin,
                                    ListModelMixin)
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
+from rest_framework.status import HTTP_202_ACCEPTED, HTTP_204_NO_CONTENT
+from reviews.cache import get_versions
+from reviews.deletion import enqueue_large_deletion
+
+from .serializers import DeletionJobSerializer
 
 
 class UpdateModelMixin(object):
@@ -27,8 +47,298 @@ class UpdateModelMixin(object):
         serializer.save()
 
 
+class QueuedDestroyMixin:
+    """
+    Миксин удаления объектов с большим каскадом: если за объектом
+    тянется больше DELETION_SYNC_LIMIT отзывов и комментариев, удаление
+    ставится в очередь (reviews.deletion) и ответ 202 содержит состояние
+    задачи со ссылкой на него в Location. Иначе объект удаляется сразу.
+    """
+
+    def destroy(self, request, *args, **kwargs):
+        instance = self.get_object()
+        job = enqueue_large_deletion(instance, request.user.pk)
+        if job is None:
+            self.perform_destroy(instance)
+            return Response(status=HTTP_204_NO_CONTENT)
+        location = reverse(
+            'api:deletions-detail', args=(job.pk,), request=request
+        )
+        return Response(
+            DeletionJobSerializer(job).data,
+            status=HTTP_202_ACCEPTED,
+            headers={'Location': location},
+        )
+
+
 class CreateListDestroyViewSet(CreateModelMixin,
                                ListModelMixin,
                                DestroyModelMixin,
                                viewsets.GenericViewSet):
     pass
+
+
+class CachedDictionaryListMixin:
+    """
+    Миксин списка справочника из кэша.
+    Запросы с поиском по-прежнему выполняются в базе данных.
+    """
+    dictionary = None
+
+    def list(self, request, *args, **kwargs):
+        if api_settings.SEARCH_PARAM in request.query_params:
+            return super().list(request, *args, **kwargs)
+        objects = self.dictionary.all()
+        page = self.paginate_queryset(objects)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(objects, many=True)
+        return Response(serializer.data)
+
+
+class ValuesListMixin:
+    """
+    Миксин быстрого list: страница выбирается через .values() и
+    сериализуется без создания объектов модели, если сериализатор это
+    умеет (ValuesSerializerMixin). Отключается настройкой VALUES_LIST.
+    """
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if (not settings.VALUES_LIST
+                or not hasattr(serializer_class, 'get_values_lookups')):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(
+            self.get_queryset()
+        ).prefetch_related(None).values(*self.get_values_lookups())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(list(queryset), many=True)
+        return Response(serializer.data)
+
+    def get_values_lookups(self):
+        return self.get_serializer_class().get_values_lookups()
+
+
+class SparseFieldsMixin:
+    """
+    Миксин выборочных полей для list и retrieve: ?fields=id,name
+    оставляет в ответе только перечисленные поля, ?omit=description —
+    все, кроме перечисленных. Запрос к базе сужается до столбцов этих
+    полей, prefetch и JOIN ненужных связей пропускаются
+    (SparseFieldsSerializerMixin).
+    """
+    fields_param = 'fields'
+    omit_param = 'omit'
+
+    def get_sparse_fields(self):
+        """Имена полей ответа или None, если нужен полный ответ."""
+        serializer_class = self.get_serializer_class()
+        params = self.request.query_params
+        if (self.action not in ('list', 'retrieve')
+                or not hasattr(serializer_class, 'narrow_queryset')
+                or not {self.fields_param, self.omit_param} & set(params)):
+            return None
+        available = serializer_class.Meta.fields
+        selected = split_names(params.get(self.fields_param)) or available
+        omitted = split_names(params.get(self.omit_param))
+        unknown = set(selected).union(omitted).difference(available)
+        if unknown:
+            raise ValidationError(
+                'Неизвестные поля: {}.'.format(', '.join(sorted(unknown)))
+            )
+        fields = [
+            name for name in available
+            if name in selected and name not in omitted
+        ]
+        if not fields:
+            raise ValidationError('Не выбрано ни одного поля.')
+        return fields
+
+    def get_ordering_lookups(self):
+        """Столбцы порядка, нужные курсорной пагинации."""
+        ordering = getattr(self, 'ordering', None) or ()
+        return [name.lstrip('-') for name in ordering]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_sparse_fields()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        return self.get_serializer_class().narrow_queryset(
+            queryset, fields, self.get_ordering_lookups()
+        )
+
+    def get_values_lookups(self):
+        fields = self.get_sparse_fields()
+        lookups = self.get_serializer_class().get_values_lookups(fields)
+        if fields is None:
+            return lookups
+        return lookups + [
+            name for name in self.get_ordering_lookups()
+            if name not in lookups
+        ]
+
+
+def split_names(value):
+    """Имена через запятую из параметра запроса."""
+    if value is None:
+        return []
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class ConditionalListMixin:
+    """
+    Миксин условных запросов и кэша ответов для list.
+    ETag и Last-Modified вычисляются по версиям наборов данных из кэша,
+    поэтому ответ 304 отдаётся без запросов к базе и сериализации.
+    В version_names перечисляются наборы данных, от которых зависит
+    ответ; в имена подставляются параметры URL. Если ответ об одном
+    объекте зависит от меньшего числа наборов, они перечисляются
+    в detail_version_names.
+    Ответы анонимным пользователям кэшируются по ETag: изменение
+    данных меняет версию, и устаревают только зависящие от неё ключи,
+    например страницы отзывов одного произведения.
+    """
+    version_names = ()
+    detail_version_names = None
+
+    def get_version_names(self):
+        if self.detail_version_names is not None and self.detail:
+            return self.detail_version_names
+        return self.version_names
+
+    def get_versions(self):
+        return get_versions([
+            name.format(**self.kwargs) for name in self.get_version_names()
+        ])
+
+    def get_etag(self, request, versions):
+        """
+        ETag и ключ кэша ответа. Схема и хост входят в ключ: в ответе
+        списка есть абсолютные ссылки next/previous.
+        """
+        key = '{}://{}{}?{}:{}:{}'.format(
+            request.scheme,
+            request.get_host(),
+            request.path,
+            urlencode(sorted(request.query_params.lists()), doseq=True),
+            request.accepted_renderer.format,
+            ':'.join(str(version) for version in versions),
+        )
+        return quote_etag(md5(key.encode()).hexdigest())
+
+    def get_last_modified(self, versions):
+        """
+        Last-Modified с точностью до секунды. Пока секунда последнего
+        изменения не закончилась, следующее изменение получит ту же
+        дату, поэтому дата не отдаётся и If-Modified-Since не проверяется.
+        """
+        last_modified = max(versions) // 10 ** 9
+        if last_modified >= time.time_ns() // 10 ** 9:
+            return None
+        return last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        versions = self.get_versions()
+        etag = self.get_etag(request, versions)
+        last_modified = self.get_last_modified(versions)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            return response
+        if request.user.is_authenticated:
+            response = handler(request, *args, **kwargs)
+        else:
+            response = self.cached_response(
+                f'response:{etag}', handler, request, *args, **kwargs
+            )
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def cached_response(self, key, handler, request, *args, **kwargs):
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """Миксин условных запросов для list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+@lru_cache(maxsize=None)
+def read_executor():
+    """
+    Пул потоков асинхронного чтения, общий для всех представлений
+    процесса. У каждого потока свои соединения с базой данных, поэтому
+    размер пула (ASYNC_READ_THREADS) ограничивает их число.
+    """
+    return ThreadPoolExecutor(
+        settings.ASYNC_READ_THREADS, thread_name_prefix='async-read'
+    )
+
+
+class AsyncReadMixin:
+    """
+    Миксин асинхронного представления для работы под ASGI.
+    Безопасные запросы выполняются целиком, вместе с рендерингом ответа,
+    в ограниченном пуле потоков read_executor() и не ждут общего потока
+    синхронного кода Django; соединения с базой данных в потоках пула
+    закрываются так же, как по окончании обычного запроса. Изменяющие
+    запросы выполняются в общем потоке, как синхронные представления.
+    Включается настройкой ASYNC_VIEWS, которую выставляет asgi.py.
+    """
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not settings.ASYNC_VIEWS:
+            return view
+
+        def read(request, *args, **kwargs):
+            close_old_connections()
+            try:
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+                return response
+            finally:
+                close_old_connections()
+
+        read_view = sync_to_async(
+            read, thread_sensitive=False, executor=read_executor()
+        )
+        write_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if request.method in SAFE_METHODS:
+                return await read_view(request, *args, **kwargs)
+            return await write_view(request, *args, **kwargs)
+
+        return update_wrapper(async_view, view)
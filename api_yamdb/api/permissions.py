@@ -31,6 +31,6 @@ class IsOwnerOrStaffOrReadOnly(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return (request.method in SAFE_METHODS
-                or obj.author == request.user
+                or obj.author_id == request.user.id
                 or request.user.is_admin
                 or request.user.is_moderator)
@@ -0,0 +1,147 @@
+import asyncio
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+from reviews.cache import PRIMARY_POSITION_KEY
+
+from api_yamdb.db.replication import replica_caught_up
+
+current_reads = ContextVar('current_reads', default=None)
+
+
+def pin_key(user_id):
+    return f'replica_pin:{user_id}'
+
+
+class RequestReads:
+    """
+    Выбор базы данных для чтения в рамках одного запроса.
+    Реплика выбирается один раз на запрос. Ответы кэшируются под
+    версиями данных, поэтому реплика используется, только если она
+    применила журнал основной базы до позиции последнего изменения
+    версий; иначе, как и без сохранённой позиции, запрос читает
+    с основной базы. Пользователь, недавно изменявший данные, тоже
+    читает с основной базы, чтобы сразу видеть свои изменения.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.enabled = False
+        self.replica = random.choice(settings.DATABASE_REPLICAS)
+        self.replica_alias = None
+        self.alias = None
+
+    def get_replica_alias(self):
+        if self.replica_alias is None:
+            position = cache.get(PRIMARY_POSITION_KEY)
+            if position is not None and replica_caught_up(
+                self.replica, position
+            ):
+                self.replica_alias = self.replica
+            else:
+                self.replica_alias = DEFAULT_DB_ALIAS
+        return self.replica_alias
+
+    def get_alias(self):
+        if self.alias is not None:
+            return self.alias
+        user = getattr(self.request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return self.get_replica_alias()
+        if cache.get(pin_key(user.pk)):
+            self.alias = DEFAULT_DB_ALIAS
+        else:
+            self.alias = self.get_replica_alias()
+        return self.alias
+
+
+class ReplicaRouter:
+    """
+    Направляет чтение на реплики, если запрос это разрешил
+    (см. ReplicaMiddleware); запись и миграции — только основная база.
+    """
+
+    def db_for_read(self, model, **hints):
+        reads = current_reads.get()
+        if reads is None or not reads.enabled:
+            return None
+        return reads.get_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+    """
+    Разрешает чтение с реплик безопасным запросам к представлениям
+    с replica_reads = True. После успешного изменяющего запроса
+    пользователь на REPLICA_PIN_SECONDS секунд закрепляется за основной
+    базой, чтобы сразу видеть свои изменения.
+    Без настроенных реплик ничего не делает.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_reads.reset(token)
+        self.finish(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_reads.reset(token)
+        self.finish(request, response)
+        return response
+
+    def start(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return current_reads.set(None)
+        return current_reads.set(RequestReads(request))
+
+    def finish(self, request, response):
+        if (not settings.DATABASE_REPLICAS
+                or request.method in SAFE_METHODS
+                or response.status_code >= 400):
+            return
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            cache.set(pin_key(user.pk), True, settings.REPLICA_PIN_SECONDS)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.enable_reads(request, view_func)
+
+    async def aprocess_view(self, request, view_func, view_args,
+                            view_kwargs):
+        self.enable_reads(request, view_func)
+
+    def enable_reads(self, request, view_func):
+        reads = current_reads.get()
+        if (reads is not None and request.method in SAFE_METHODS
+                and getattr(view_func, 'cls', None) is not None
+                and getattr(view_func.cls, 'replica_reads', False)):
+            reads.enabled = True
@@ -1,9 +1,142 @@
+from collections import defaultdict
+from functools import lru_cache
+
+from django.db.models import Q
+from django.utils.encoding import smart_str
 from rest_framework import serializers
-from reviews.models import Category, Comment, Genre, Review, Title
+from rest_framework.relations import ManyRelatedField, RelatedField
+from reviews.cache import categories, genres
+from reviews.leaderboards import OVERALL, category_scope, genre_scope
+from reviews.models import (SCORES, Category, Comment, DeletionJob, Genre,
+                            LeaderboardEntry, Review, Title, TitleGenre,
+                            score_count_field)
 from users.models import User
 
+from .metrics import TimedListSerializer, TimedSerializerMixin
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """Поле, ищущее объект по slug в кэше справочника, а не в базе."""
+
+    def __init__(self, dictionary, **kwargs):
+        self.dictionary = dictionary
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            obj = self.dictionary.get_by_slug(data)
+        except TypeError:
+            self.fail('invalid')
+        if obj is None:
+            self.fail(
+                'does_not_exist',
+                slug_name=self.slug_field,
+                value=smart_str(data)
+            )
+        return obj
+
+
+class ValuesListSerializer(TimedListSerializer):
+    """
+    Список, принимающий вместо объектов модели строки .values():
+    они сериализуются методом to_representation_rows элемента.
+    """
+
+    def to_representation(self, data):
+        if isinstance(data, list) and data and isinstance(data[0], dict):
+            return self.child.to_representation_rows(data)
+        return super().to_representation(data)
+
+
+class ValuesSerializerMixin:
+    """
+    Сериализация только для чтения по строкам .values() без создания
+    объектов модели. values_fields задаёт выражение для values(), если
+    оно отличается от имени поля, или None, если значение поля в строку
+    подставляет to_representation_rows. Связанные поля и вложенные
+    сериализаторы берутся из строки как есть, остальные проходят через
+    to_representation поля, поэтому ответ совпадает с обычным.
+    """
+    values_fields = {}
+
+    @classmethod
+    def get_values_lookups(cls, fields=None):
+        """Выражения values() для полей fields (по умолчанию всех)."""
+        lookups = (
+            cls.values_fields.get(name, name)
+            for name in (cls.Meta.fields if fields is None else fields)
+        )
+        return [lookup for lookup in lookups if lookup is not None]
+
+    def to_representation_rows(self, rows):
+        fields = [
+            (
+                name,
+                self.values_fields.get(name, name) or name,
+                None if isinstance(field, (
+                    RelatedField, ManyRelatedField, serializers.BaseSerializer
+                )) else field.to_representation,
+            )
+            for name, field in self.fields.items() if not field.write_only
+        ]
+        return [
+            {
+                name: (
+                    row[lookup] if convert is None or row[lookup] is None
+                    else convert(row[lookup])
+                )
+                for name, lookup, convert in fields
+            }
+            for row in rows
+        ]
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Выборочные поля: представление передаёт в context['fields'] имена
+    полей ответа, остальные поля из сериализатора убираются.
+    narrow_queryset сужает запрос до столбцов этих полей, выражения
+    берутся из get_values_lookups (ValuesSerializerMixin).
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        names = self.context.get('fields')
+        if names is None:
+            return fields
+        for name in [name for name in fields if name not in names]:
+            del fields[name]
+        return fields
+
+    @classmethod
+    def narrow_queryset(cls, queryset, fields, extra=()):
+        lookups = cls.get_values_lookups(fields)
+        related = {
+            lookup.split('__')[0] for lookup in lookups if '__' in lookup
+        }
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*lookups, *extra)
 
-class UserSerializer(serializers.ModelSerializer):
+
+def dictionary_representation(serializer, dictionary):
+    """
+    Представление объекта справочника по pk, один раз на объект.
+    Объекта, которого нет и в перечитанном справочнике, уже нет в базе:
+    для него возвращается None.
+    """
+    objects = dictionary.pk_map()
+
+    @lru_cache(maxsize=None)
+    def representation(pk):
+        obj = objects.get(pk) or dictionary.get(pk)
+        return None if obj is None else serializer.to_representation(obj)
+    return representation
+
+
+class UserSerializer(TimedSerializerMixin,
+                     serializers.ModelSerializer):
     """Сериализатор модели User."""
     email = serializers.EmailField(max_length=254, required=True)
     username = serializers.SlugField(max_length=50, required=True)
@@ -13,18 +146,22 @@ class UserSerializer(serializers.ModelSerializer):
             'username', 'email', 'first_name', 'last_name', 'bio', 'role'
         )
         model = User
+        list_serializer_class = TimedListSerializer
         read_only_field = ('role',)
 
     def validate(self, data):
         email = data.get('email')
         username = data.get('username')
-        if (not User.objects.filter(email=email).exists()
-                and User.objects.filter(username=username).exists()):
-            raise serializers.ValidationError(
-                'Пользователь с этой почтой уже существует.'
-            )
-        if (User.objects.filter(email=email).exists()
-                and not User.objects.filter(username=username).exists()):
+        users = list(
+            User.objects.filter(
+                Q(email=email) | Q(username=username)
+            ).order_by()
+        )
+        self.email_owner = next(
+            (user for user in users if user.email == email), None
+        )
+        username_taken = any(user.username == username for user in users)
+        if (self.email_owner is not None) != username_taken:
             raise serializers.ValidationError(
                 'Пользователь с этой почтой уже существует.'
             )
@@ -41,23 +178,28 @@ class JWTSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField(required=True)
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin,
+                         serializers.ModelSerializer):
     """Класс сериализатор категории."""
 
     class Meta:
         fields = ('name', 'slug')
         model = Category
+        list_serializer_class = TimedListSerializer
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin,
+                      serializers.ModelSerializer):
     """Класс сериализатор жанра."""
 
     class Meta:
         fields = ('name', 'slug')
         model = Genre
+        list_serializer_class = TimedListSerializer
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
+class TitleReadSerializer(SparseFieldsSerializerMixin, ValuesSerializerMixin,
+                          TimedSerializerMixin, serializers.ModelSerializer):
     """Класс сериализатор получения списка произведений."""
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(
@@ -65,21 +207,132 @@ class TitleReadSerializer(serializers.ModelSerializer):
         required=False,
     )
     rating = serializers.IntegerField(read_only=True)
+    values_fields = {'genre': None, 'category': None}
 
     class Meta:
         fields = (
             'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
         )
         model = Title
+        list_serializer_class = ValuesListSerializer
+
+    @classmethod
+    def get_values_lookups(cls, fields=None):
+        lookups = super().get_values_lookups(fields)
+        if fields is None or 'category' in fields:
+            lookups.append('category_id')
+        if fields is not None and 'genre' in fields and 'id' not in fields:
+            lookups.append('id')
+        return lookups
+
+    @classmethod
+    def narrow_queryset(cls, queryset, fields, extra=()):
+        """Без жанров пропускается prefetch, без категории — JOIN."""
+        queryset = super().narrow_queryset(queryset, fields, extra)
+        if 'genre' not in fields:
+            queryset = queryset.prefetch_related(None)
+        if 'category' in fields:
+            queryset = queryset.select_related('category')
+        return queryset
+
+    def to_representation_rows(self, rows):
+        """
+        Жанры страницы выбираются одним запросом без соединения таблиц,
+        жанры и категории берутся из кэша справочников.
+        """
+        if 'genre' in self.fields:
+            self.add_genres(rows)
+        if 'category' in self.fields:
+            category = dictionary_representation(
+                self.fields['category'], categories
+            )
+            for row in rows:
+                row['category'] = (
+                    None if row['category_id'] is None
+                    else category(row['category_id'])
+                )
+        return super().to_representation_rows(rows)
+
+    def add_genres(self, rows):
+        genre_ids = defaultdict(list)
+        title_genres = TitleGenre.objects.filter(
+            title_id__in=[row['id'] for row in rows]
+        ).order_by('genre_id').values_list('title_id', 'genre_id')
+        for title_id, genre_id in title_genres:
+            genre_ids[title_id].append(genre_id)
+        genre = dictionary_representation(
+            self.fields['genre'].child, genres
+        )
+        for row in rows:
+            row['genre'] = [
+                representation for representation in map(
+                    genre, genre_ids[row['id']]
+                ) if representation is not None
+            ]
+
+
+class TitleDetailSerializer(TitleReadSerializer):
+    """Произведение с числом отзывов по каждой оценке."""
+    scores = serializers.DictField(
+        source='score_counts', child=serializers.IntegerField(),
+        read_only=True,
+    )
+    values_fields = {**TitleReadSerializer.values_fields, 'scores': None}
+
+    class Meta(TitleReadSerializer.Meta):
+        fields = TitleReadSerializer.Meta.fields + ('scores',)
+
+    @classmethod
+    def get_values_lookups(cls, fields=None):
+        lookups = super().get_values_lookups(fields)
+        if fields is None or 'scores' in fields:
+            lookups.extend(score_count_field(score) for score in SCORES)
+        return lookups
+
+
+class TitleScoresQuerySerializer(serializers.Serializer):
+    """Параметры запроса оценок: id произведений через запятую."""
+    ids = serializers.CharField()
+
+    def validate_ids(self, value):
+        try:
+            ids = {int(pk) for pk in value.split(',') if pk.strip()}
+        except ValueError:
+            raise serializers.ValidationError(
+                'Укажите id произведений через запятую.'
+            )
+        if not ids:
+            raise serializers.ValidationError('Не указано ни одного id.')
+        if len(ids) > 100:
+            raise serializers.ValidationError(
+                'Можно запросить не больше 100 произведений.'
+            )
+        return ids
+
+
+class TitleScoresSerializer(TimedSerializerMixin,
+                            serializers.ModelSerializer):
+    """Число отзывов по каждой оценке произведения."""
+    scores = serializers.DictField(
+        source='score_counts', child=serializers.IntegerField(),
+        read_only=True,
+    )
+
+    class Meta:
+        fields = ('id', 'scores')
+        model = Title
+        list_serializer_class = TimedListSerializer
 
 
 class TitleWriteSerializer(serializers.ModelSerializer):
     """Класс сериализатор создания произведений."""
-    category = serializers.SlugRelatedField(
+    category = CachedSlugRelatedField(
+        dictionary=categories,
         queryset=Category.objects.all(),
         slug_field='slug'
     )
-    genre = serializers.SlugRelatedField(
+    genre = CachedSlugRelatedField(
+        dictionary=genres,
         queryset=Genre.objects.all(),
         slug_field='slug',
         many=True
@@ -92,32 +345,98 @@ class TitleWriteSerializer(serializers.ModelSerializer):
         model = Title
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsSerializerMixin, ValuesSerializerMixin,
+                       TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор модели отзывов."""
     author = serializers.StringRelatedField(read_only=True,)
+    values_fields = {'title': 'title_id', 'author': 'author__username'}
 
     class Meta:
         fields = ('id', 'title', 'author', 'text', 'score', 'pub_date')
         read_only_fields = ('title',)
         model = Review
+        list_serializer_class = ValuesListSerializer
 
     def validate(self, data):
         if self.context['request'].method != 'POST':
             return data
         user = self.context['request'].user
         title_id = self.context['view'].kwargs.get('title_id')
-        if Review.objects.filter(author=user, title_id=title_id).exists():
+        if Review.objects.filter(
+                author_id=user.id, title_id=title_id
+        ).exists():
             raise serializers.ValidationError(
                 'Отзыв уже оставлен!'
             )
         return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsSerializerMixin, ValuesSerializerMixin,
+                        TimedSerializerMixin, serializers.ModelSerializer):
     '''Сериалайзер комментариев.'''
     author = serializers.StringRelatedField(read_only=True)
+    values_fields = {'review': 'review_id', 'author': 'author__username'}
 
     class Meta:
         fields = ('id', 'review', 'author', 'text', 'pub_date')
         read_only_fields = ('review',)
         model = Comment
+        list_serializer_class = ValuesListSerializer
+
+
+class LeaderboardQuerySerializer(serializers.Serializer):
+    """Параметры запроса рейтинга: вид, категория или жанр, число мест."""
+    by = serializers.ChoiceField(
+        choices=('rating', 'reviews'), default='rating'
+    )
+    category = CachedSlugRelatedField(
+        dictionary=categories, slug_field='slug', read_only=False,
+        queryset=Category.objects.all(), required=False,
+    )
+    genre = CachedSlugRelatedField(
+        dictionary=genres, slug_field='slug', read_only=False,
+        queryset=Genre.objects.all(), required=False,
+    )
+    limit = serializers.IntegerField(
+        min_value=1, max_value=100, default=10
+    )
+
+    def validate(self, data):
+        if 'category' in data and 'genre' in data:
+            raise serializers.ValidationError(
+                'Укажите либо категорию, либо жанр.'
+            )
+        if 'category' in data:
+            data['scope'] = category_scope(data['category'].pk)
+        elif 'genre' in data:
+            data['scope'] = genre_scope(data['genre'].pk)
+        else:
+            data['scope'] = OVERALL
+        return data
+
+
+class LeaderboardSerializer(TimedSerializerMixin,
+                            serializers.ModelSerializer):
+    """Произведение в рейтинге."""
+    id = serializers.IntegerField(source='title_id')
+    name = serializers.CharField(source='title.name')
+    year = serializers.IntegerField(source='title.year')
+    rating = serializers.IntegerField()
+
+    class Meta:
+        fields = ('id', 'name', 'year', 'rating', 'reviews_count')
+        model = LeaderboardEntry
+        list_serializer_class = TimedListSerializer
+
+
+class DeletionJobSerializer(TimedSerializerMixin,
+                            serializers.ModelSerializer):
+    """Состояние задачи удаления."""
+
+    class Meta:
+        fields = (
+            'id', 'target', 'object_id', 'status', 'deleted', 'created',
+            'started_at', 'finished_at',
+        )
+        model = DeletionJob
+        list_serializer_class = TimedListSerializer
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from users.models import User
+
+from .authentication import publish_user_state
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """
+    Роль и активность изменённого пользователя действуют сразу,
+    не дожидаясь истечения выданных ему токенов.
+    """
+    if not created:
+        publish_user_state(instance)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    """Токены удалённого пользователя перестают приниматься."""
+    publish_user_state(instance, deleted=True)
@@ -0,0 +1,105 @@
+from contextlib import suppress
+
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Ограничение частоты изменяющих запросов со скользящим окном.
+    Число запросов за окно оценивается по двум счётчикам в общем кэше
+    throttle: текущего окна фиксированной длины и предыдущего, который
+    учитывается пропорционально ещё не истёкшей доле окна. Счётчик
+    сначала атомарно увеличивается, а затем сравнивается с лимитом,
+    поэтому одновременные запросы не проходят проверку вместе, а лимит
+    общий для всех воркеров. Отклонённый запрос возвращает счётчик
+    назад. В кэше хранится по два числа на клиента вместо списка
+    отметок времени.
+    Безопасные запросы не ограничиваются.
+    Лимиты берутся из DEFAULT_THROTTLE_RATES при каждом запросе;
+    лимит None отключает ограничение.
+    """
+    cache = caches['throttle']
+
+    def __init__(self):
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+
+    def get_scope(self, view):
+        return self.scope
+
+    def get_cache_key(self, request, view):
+        if request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        self.scope = self.get_scope(view)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        current_key = f'{self.key}_{window}'
+        previous_key = f'{self.key}_{window - 1}'
+        self.current = self.increment(current_key) - 1
+        self.previous = self.cache.get(previous_key, 0)
+        self.elapsed = self.now - window * self.duration
+        estimate = (
+            self.previous * (1 - self.elapsed / self.duration) + self.current
+        )
+        if estimate >= self.num_requests:
+            with suppress(ValueError):
+                self.cache.decr(current_key)
+            return self.throttle_failure()
+        return True
+
+    def increment(self, key):
+        """Увеличивает счётчик окна и возвращает новое значение."""
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            if self.cache.add(key, 1, 2 * self.duration):
+                return 1
+            return self.cache.incr(key)
+
+    def wait(self):
+        """Через сколько секунд оценка опустится ниже лимита."""
+        if self.current >= self.num_requests:
+            wait = (
+                self.duration - self.elapsed
+                + self.duration * (1 - self.num_requests / self.current)
+            )
+        else:
+            wait = (
+                self.duration
+                * (1 - (self.num_requests - self.current) / self.previous)
+                - self.elapsed
+            )
+        return max(wait, 1)
+
+
+class ScopedWriteThrottle(SlidingWindowThrottle):
+    """Лимит изменяющих запросов по throttle_scope представления."""
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', None)
+
+
+class SignupThrottle(SlidingWindowThrottle):
+    """Лимит запросов регистрации с одного адреса."""
+    scope = 'signup'
+
+
+class TokenThrottle(SlidingWindowThrottle):
+    """Лимит запросов токена с одного адреса."""
+    scope = 'token'
@@ -1,7 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
+from .views import (CategoryViewSet, CommentViewSet, DeletionJobViewSet,
+                    GenreViewSet, LeaderboardViewSet, MetricsView,
                     ReviewViewSet, TitleViewSet, UserViewSet, signup, token)
 
 app_name = 'api'
@@ -11,6 +12,10 @@ router_v1.register('categories', CategoryViewSet, basename='categories')
 router_v1.register('genres', GenreViewSet, basename='genres')
 router_v1.register('titles', TitleViewSet, basename='titles')
 router_v1.register('users', UserViewSet, basename='users')
+router_v1.register(
+    'leaderboards', LeaderboardViewSet, basename='leaderboards'
+)
+router_v1.register('deletions', DeletionJobViewSet, basename='deletions')
 router_v1.register(
     r'titles/(?P<title_id>\d+)/reviews',
     ReviewViewSet,
@@ -30,4 +35,5 @@ auth_patterns = [
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
     path('v1/auth/', include(auth_patterns)),
+    path('v1/metrics/', MetricsView.as_view()),
 ]
@@ -1,50 +1,73 @@
-from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg, F
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from prometheus_client import CONTENT_TYPE_LATEST
 from rest_framework import filters, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
 from rest_framework.filters import SearchFilter
-from rest_framework.mixins import RetrieveModelMixin
+from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title
+from rest_framework.views import APIView
+from reviews.cache import categories, genres
+from reviews.models import (SCORES, Category, Comment, DeletionJob, Genre,
+                            LeaderboardEntry, Review, Title, score_count_field)
+from users.mail import enqueue_email
 from users.models import User
 
+from .authentication import access_token_for
 from .filters import TitleFilter
-from .mixins import CreateListDestroyViewSet, UpdateModelMixin
+from .metrics import registry
+from .mixins import (AsyncReadMixin, CachedDictionaryListMixin,
+                     ConditionalGetMixin, ConditionalListMixin,
+                     CreateListDestroyViewSet, QueuedDestroyMixin,
+                     SparseFieldsMixin, UpdateModelMixin, ValuesListMixin)
+from .pagination import SelectablePagination
 from .permissions import IsAdmin, IsAdminOrReadOnly, IsOwnerOrStaffOrReadOnly
 from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, JWTSerializer, ReviewSerializer,
-                          TitleReadSerializer, TitleWriteSerializer,
-                          UserSerializer)
+                          DeletionJobSerializer, GenreSerializer,
+                          JWTSerializer, LeaderboardQuerySerializer,
+                          LeaderboardSerializer, ReviewSerializer,
+                          TitleDetailSerializer, TitleReadSerializer,
+                          TitleScoresQuerySerializer, TitleScoresSerializer,
+                          TitleWriteSerializer, UserSerializer)
+from .throttling import SignupThrottle, TokenThrottle
 
 
 @api_view(['POST'])
 @permission_classes((AllowAny,))
+@throttle_classes((SignupThrottle,))
 def signup(request):
     """
     Запрос регистрации нового пользователя.
     Создаёт нового пользователя, если он не был создан ранее администратором.
-    Отправляет код подтверждения на email пользователя.
+    Совпадения по почте и имени ищутся одним запросом в сериализаторе.
+    Если те же данные одновременно зарегистрировал другой запрос,
+    вставка нарушит ограничение уникальности, и проверка повторяется.
+    Ставит письмо с кодом подтверждения в очередь отправки.
     """
     serializer = UserSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     email = serializer.validated_data.get('email')
     username = serializer.validated_data.get('username')
-    if (not User.objects.filter(email=email).exists()
-            and not User.objects.filter(username=username).exists()):
-        User.objects.create(username=username, email=email)
-    user = User.objects.filter(email=email).first()
+    user = serializer.email_owner
+    if user is None:
+        try:
+            with transaction.atomic():
+                user = User.objects.create(username=username, email=email)
+        except IntegrityError:
+            serializer = UserSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            user = serializer.email_owner
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
+    enqueue_email(
         'Код подтверждения Yamdb',
         f'Ваш код подтверждения: {confirmation_code}',
-        settings.DEFAULT_FROM_EMAIL,
-        [email]
+        email,
     )
     return Response(
         {'email': str(email), 'username': str(username)},
@@ -54,6 +77,7 @@ def signup(request):
 
 @api_view(['POST'])
 @permission_classes((AllowAny,))
+@throttle_classes((TokenThrottle,))
 def token(request):
     """
     Запрос на получение JWT токена.
@@ -67,7 +91,7 @@ def token(request):
     )
     user = get_object_or_404(User, username=username)
     if default_token_generator.check_token(user, confirmation_code):
-        token = AccessToken.for_user(user)
+        token = access_token_for(user)
         return Response(
             {'token': str(token)}, status=HTTP_200_OK
         )
@@ -77,7 +101,18 @@ def token(request):
     )
 
 
-class UserViewSet(CreateListDestroyViewSet,
+class MetricsView(APIView):
+    """Метрики запросов в текстовом формате Prometheus."""
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return HttpResponse(
+            registry.render(), content_type=CONTENT_TYPE_LATEST
+        )
+
+
+class UserViewSet(QueuedDestroyMixin,
+                  CreateListDestroyViewSet,
                   UpdateModelMixin,
                   RetrieveModelMixin):
     """Просмотр и редактирование пользователей."""
@@ -92,7 +127,7 @@ class UserViewSet(CreateListDestroyViewSet,
             methods=['patch', 'get'],
             permission_classes=[IsAuthenticated])
     def me(self, request):
-        user = self.request.user
+        user = get_object_or_404(User, pk=request.user.pk)
         serializer = self.get_serializer(user)
         if self.request.method == 'PATCH':
             serializer = self.get_serializer(
@@ -103,9 +138,14 @@ class UserViewSet(CreateListDestroyViewSet,
         return Response(serializer.data)
 
 
-class CategoryViewSet(CreateListDestroyViewSet):
+class CategoryViewSet(ConditionalListMixin,
+                      CachedDictionaryListMixin,
+                      CreateListDestroyViewSet):
     """Просмотр и редактирование категорий."""
     queryset = Category.objects.all()
+    replica_reads = True
+    dictionary = categories
+    version_names = ('reviews.category',)
     serializer_class = CategorySerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = [SearchFilter]
@@ -113,9 +153,14 @@ class CategoryViewSet(CreateListDestroyViewSet):
     search_fields = ('=name',)
 
 
-class GenreViewSet(CreateListDestroyViewSet):
+class GenreViewSet(ConditionalListMixin,
+                   CachedDictionaryListMixin,
+                   CreateListDestroyViewSet):
     """Просмотр и редактирование жанров."""
     queryset = Genre.objects.all()
+    replica_reads = True
+    dictionary = genres
+    version_names = ('reviews.genre',)
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (SearchFilter,)
@@ -123,25 +168,66 @@ class GenreViewSet(CreateListDestroyViewSet):
     search_fields = ('=name',)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(AsyncReadMixin, ConditionalGetMixin, SparseFieldsMixin,
+                   ValuesListMixin, QueuedDestroyMixin,
+                   viewsets.ModelViewSet):
     """Просмотр и редактирование названий."""
-    queryset = Title.objects.annotate(
-        rating=Avg(F('review__score'))
+    queryset = Title.objects.select_related('category').prefetch_related(
+        Prefetch('genre', queryset=Genre.objects.order_by('pk'))
+    ).defer('search_vector').order_by('pk')
+    version_names = (
+        'reviews.title', 'reviews.rating', 'reviews.titlegenre',
+        'reviews.category', 'reviews.genre',
+    )
+    detail_version_names = (
+        'reviews.title', 'reviews.title:{pk}', 'reviews.titlegenre',
+        'reviews.category', 'reviews.genre',
     )
     permission_classes = (IsAdminOrReadOnly,)
     filterset_class = TitleFilter
+    replica_reads = True
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action == 'list':
             return TitleReadSerializer
+        if self.action == 'retrieve':
+            return TitleDetailSerializer
+        if self.action == 'scores':
+            return TitleScoresSerializer
         return TitleWriteSerializer
 
+    @action(detail=False, filter_backends=(), pagination_class=None)
+    def scores(self, request):
+        """
+        Число отзывов по каждой оценке для многих произведений сразу:
+        ?ids=1,2,3 (не больше 100). Один запрос по хранимым счётчикам.
+        """
+        return self.conditional_response(self.list_scores, request)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def list_scores(self, request):
+        query = TitleScoresQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        titles = Title.objects.filter(
+            pk__in=query.validated_data['ids']
+        ).only(
+            'pk', *(score_count_field(score) for score in SCORES)
+        ).order_by('pk')
+        return Response(self.get_serializer(titles, many=True).data)
+
+
+class ReviewViewSet(AsyncReadMixin, ConditionalGetMixin, SparseFieldsMixin,
+                    ValuesListMixin, QueuedDestroyMixin,
+                    viewsets.ModelViewSet):
     """Просмотр и редактирование рецензий."""
     serializer_class = ReviewSerializer
     permission_classes = (IsOwnerOrStaffOrReadOnly,)
-    ordering = ('-pub_date')
+    throttle_scope = 'reviews'
+    replica_reads = True
+    pagination_class = SelectablePagination
+    ordering = ('-pub_date', '-id')
+    version_names = (
+        'reviews.review', 'reviews.review:{title_id}', 'users.user',
+    )
 
     def get_title(self):
         title_id = self.kwargs.get('title_id')
@@ -149,18 +235,36 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         title = ReviewViewSet.get_title(self)
-        return title.review.all()
+        return Review.objects.filter(title=title).select_related(
+            'author'
+        ).order_by(*self.ordering)
 
+    @transaction.atomic
     def perform_create(self, serializer):
         title = ReviewViewSet.get_title(self)
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author_id=self.request.user.id, title=title)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(AsyncReadMixin, ConditionalGetMixin, SparseFieldsMixin,
+                     ValuesListMixin, viewsets.ModelViewSet):
     """Просмотр и редактирование комментариев."""
     serializer_class = CommentSerializer
     permission_classes = (IsOwnerOrStaffOrReadOnly,)
-    ordering = ('-pub_date')
+    throttle_scope = 'comments'
+    replica_reads = True
+    pagination_class = SelectablePagination
+    ordering = ('-pub_date', '-id')
+    version_names = (
+        'reviews.comment', 'reviews.comment:{review_id}', 'users.user',
+    )
 
     def get_review(self):
         review_id = self.kwargs.get('review_id')
@@ -168,8 +272,54 @@ class CommentViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         review = CommentViewSet.get_review(self)
-        return review.comments.all()
+        return Comment.objects.filter(review=review).select_related(
+            'author'
+        ).order_by(*self.ordering)
 
     def perform_create(self, serializer):
         review = CommentViewSet.get_review(self)
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author_id=self.request.user.id, review=review)
+
+
+class DeletionJobViewSet(RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Состояние задачи удаления: администратору — любой, остальным —
+    только запрошенных ими.
+    """
+    serializer_class = DeletionJobSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        if self.request.user.is_admin:
+            return DeletionJob.objects.all()
+        return DeletionJob.objects.filter(
+            requested_by_id=self.request.user.id
+        )
+
+
+class LeaderboardViewSet(ConditionalListMixin, ListModelMixin,
+                         viewsets.GenericViewSet):
+    """
+    Первые места по рейтингу (?by=rating) или числу отзывов
+    (?by=reviews): среди всех произведений, в категории (?category=slug)
+    или жанре (?genre=slug). Читаются из материализованных рейтингов.
+    """
+    serializer_class = LeaderboardSerializer
+    pagination_class = None
+    filter_backends = ()
+    replica_reads = True
+    version_names = (
+        'reviews.title', 'reviews.rating', 'reviews.category',
+        'reviews.genre',
+    )
+
+    def get_queryset(self):
+        query = LeaderboardQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        return LeaderboardEntry.objects.top(
+            params['scope'], params['by'], params['limit']
+        ).select_related('title').only(
+            'title_id', 'rating', 'reviews_count', 'title__name',
+            'title__year',
+        )
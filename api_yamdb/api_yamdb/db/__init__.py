@@ -0,0 +1,12 @@
+from django.db import connections
+
+from .pool import close_pools
+
+
+def close_all():
+    """
+    Закрывает соединения текущего потока, как connections.close_all(),
+    и пулы процесса: после этого у процесса не остаётся сессий с базой.
+    """
+    connections.close_all()
+    close_pools()
@@ -0,0 +1,205 @@
+import os
+import threading
+import time
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """
+    Пул соединений с базой данных в памяти процесса.
+    Соединения создаются по мере надобности, но не больше max_size;
+    при исчерпании пула запрос ждёт освобождения соединения не дольше
+    timeout секунд. Соединение, пролежавшее в пуле дольше
+    health_check_interval секунд, перед выдачей проверяется функцией
+    check. Ведёт счётчики для метрик: ожидание, тайм-ауты, размер.
+    После close() соединения в пул не возвращаются, а закрываются.
+    """
+
+    def __init__(self, connect, check, max_size, timeout,
+                 health_check_interval=0):
+        self.connect = connect
+        self.check = check
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.condition = threading.Condition()
+        self.idle = []
+        self.size = 0
+        self.acquired = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.closed = False
+
+    @property
+    def in_use(self):
+        return self.size - len(self.idle)
+
+    def acquire(self):
+        while True:
+            connection, released_at = self.take()
+            if connection is None:
+                try:
+                    return self.connect()
+                except Exception:
+                    self.discard(None)
+                    raise
+            idle_for = time.monotonic() - released_at
+            if (not self.health_check_interval
+                    or idle_for < self.health_check_interval
+                    or self.check(connection)):
+                return connection
+            self.discard(connection)
+
+    def take(self):
+        """
+        Свободное соединение и время его возврата в пул либо (None, None),
+        если можно открыть новое соединение: место под него уже занято.
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self.condition:
+            while not self.idle and self.size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeoutError(
+                        f'No free connection in {self.timeout}s '
+                        f'(pool size {self.max_size})'
+                    )
+                self.condition.wait(remaining)
+            self.acquired += 1
+            self.wait_time += time.monotonic() - started
+            if self.idle:
+                return self.idle.pop()
+            self.size += 1
+            return None, None
+
+    def release(self, connection, reset):
+        """Возвращает соединение в пул, если reset смог его очистить."""
+        try:
+            reusable = reset(connection)
+        except Exception:
+            reusable = False
+        with self.condition:
+            if reusable and not self.closed:
+                self.idle.append((connection, time.monotonic()))
+                self.condition.notify()
+                return
+        self.discard(connection)
+
+    def discard(self, connection):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+        if connection is not None:
+            close_quietly(connection)
+
+    def close(self):
+        """Закрывает свободные соединения; занятые закроются при возврате."""
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.size -= len(idle)
+            self.condition.notify_all()
+        for connection, _ in idle:
+            close_quietly(connection)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'max_size': self.max_size,
+                'size': self.size,
+                'in_use': self.in_use,
+                'acquired': self.acquired,
+                'wait_time': self.wait_time,
+                'timeouts': self.timeouts,
+            }
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, conn_params, factory):
+    """
+    Пул соединений псевдонима базы данных в текущем процессе.
+    Смена параметров подключения (например, тестовая база данных)
+    даёт новый пул. Пулы не переживают fork: после него создаются заново.
+    """
+    key = (
+        alias, conn_params.get('database', ''),
+        repr(sorted(conn_params.items())), os.getpid(),
+    )
+    with pools_lock:
+        if key not in pools:
+            pools[key] = factory()
+        return pools[key]
+
+
+def close_pools(alias=None):
+    """
+    Закрывает пулы текущего процесса (все или только псевдонима alias)
+    вместе со свободными соединениями. Следующее подключение откроет
+    новый пул.
+    """
+    with pools_lock:
+        closing = [
+            pools.pop(key) for key in list(pools)
+            if alias in (None, key[0]) and key[3] == os.getpid()
+        ]
+    for pool in closing:
+        pool.close()
+
+
+def forget_pools():
+    """
+    Очищает унаследованные при fork пулы, не закрывая их соединения:
+    сокеты принадлежат родительскому процессу, и закрытие из дочернего
+    оборвало бы его сессии.
+    """
+    global pools_lock
+    pools_lock = threading.Lock()
+    pools.clear()
+
+
+os.register_at_fork(after_in_child=forget_pools)
+
+
+def render_metrics():
+    """Метрики пулов текущего процесса в текстовом формате Prometheus."""
+    with pools_lock:
+        stats = [
+            (f'alias="{alias}",database="{database}"', pool.stats())
+            for (alias, database, _, pid), pool in pools.items()
+            if pid == os.getpid()
+        ]
+    stats.sort(key=lambda item: item[0])
+    if not stats:
+        return []
+    metrics = (
+        ('yamdb_db_pool_max_size', 'gauge', (('', 'max_size'),)),
+        ('yamdb_db_pool_connections', 'gauge', (('', 'size'),)),
+        ('yamdb_db_pool_in_use', 'gauge', (('', 'in_use'),)),
+        ('yamdb_db_pool_wait_seconds', 'summary',
+         (('_sum', 'wait_time'), ('_count', 'acquired'))),
+        ('yamdb_db_pool_timeouts_total', 'counter', (('', 'timeouts'),)),
+    )
+    lines = []
+    for name, kind, series in metrics:
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, values in stats:
+            lines.extend(
+                f'{name}{suffix}{{{labels}}} {values[key]}'
+                for suffix, key in series
+            )
+    return lines
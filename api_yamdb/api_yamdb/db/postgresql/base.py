@@ -0,0 +1,96 @@
+import time
+from functools import partial
+
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.base import Database
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from ..pool import ConnectionPool, PoolTimeoutError, close_pools, get_pool
+
+
+def check_connection(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    return True
+
+
+def reset_connection(connection):
+    """Откатывает незавершённую транзакцию перед возвратом в пул."""
+    if connection.closed:
+        return False
+    if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+    return True
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Перед удалением тестовой базы закрывает пулы: в них её сессии."""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL с проверкой постоянных соединений и необязательным пулом.
+    HEALTH_CHECK_INTERVAL: постоянное соединение (CONN_MAX_AGE) при
+    переиспользовании проверяется запросом не чаще раза в столько секунд,
+    разорванное закрывается до того, как на нём упадёт запрос.
+    POOL_MAX_SIZE: если больше нуля, соединения берутся из общего для
+    потоков процесса пула такого размера и возвращаются в него вместо
+    закрытия; POOL_TIMEOUT ограничивает ожидание свободного соединения.
+    Закрыть пулы процесса можно функцией api_yamdb.db.close_all().
+    """
+    creation_class = DatabaseCreation
+
+    def connect(self):
+        super().connect()
+        self.health_checked_at = time.monotonic()
+
+    def get_pool(self, conn_params):
+        if not self.settings_dict.get('POOL_MAX_SIZE'):
+            return None
+        return get_pool(
+            self.alias, conn_params, partial(self.create_pool, conn_params)
+        )
+
+    def create_pool(self, conn_params):
+        return ConnectionPool(
+            connect=partial(super().get_new_connection, conn_params),
+            check=check_connection,
+            max_size=self.settings_dict['POOL_MAX_SIZE'],
+            timeout=self.settings_dict.get('POOL_TIMEOUT', 5),
+            health_check_interval=self.settings_dict.get(
+                'HEALTH_CHECK_INTERVAL'
+            ),
+        )
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        if self.pool is None:
+            return super().get_new_connection(conn_params)
+        try:
+            connection = self.pool.acquire()
+        except PoolTimeoutError as error:
+            raise Database.OperationalError(str(error)) from error
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None or getattr(self, 'pool', None) is None:
+            return super()._close()
+        self.pool.release(self.connection, reset_connection)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        interval = self.settings_dict.get('HEALTH_CHECK_INTERVAL')
+        if (self.connection is None or not interval
+                or self.in_atomic_block
+                or time.monotonic() - self.health_checked_at < interval):
+            return
+        self.health_checked_at = time.monotonic()
+        if not self.is_usable():
+            self.close()
@@ -0,0 +1,31 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def primary_position():
+    """
+    Текущая позиция журнала WAL основной базы или None, если база
+    не PostgreSQL.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_current_wal_lsn()::text')
+        return cursor.fetchone()[0]
+
+
+def replica_caught_up(alias, position):
+    """
+    Реплика уже применила журнал основной базы до позиции position.
+    Базу, которая не восстанавливается из журнала (например, копию
+    на том же сервере), сравнивать не с чем: она считается актуальной.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return True
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT COALESCE(pg_last_wal_replay_lsn() >= %s::pg_lsn, TRUE)',
+            [position],
+        )
+        return cursor.fetchone()[0]
@@ -35,6 +35,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,6 +43,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.replicas.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -72,10 +74,46 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='xxxyyyzzz'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        'HEALTH_CHECK_INTERVAL': int(os.getenv('DB_HEALTH_CHECK_INTERVAL', default=30)),
+        'POOL_MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', default=0)),
+        'POOL_TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=5)),
     }
 }
 
+DATABASE_REPLICAS = []
+for number, host in enumerate(os.getenv('DB_REPLICA_HOSTS', default='').split(','), start=1):
+    if host.strip():
+        DATABASE_REPLICAS.append(f'replica_{number}')
+        DATABASES[f'replica_{number}'] = {
+            **DATABASES['default'],
+            'HOST': host.strip(),
+            'NAME': os.getenv('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', default=5))
+
+# Кэш общий для всех процессов: воркеров gunicorn, mailer и deleter.
+# В нём версии данных, состояние пользователей, счётчики лимитов
+# и отметки чтения с основной базы. LocMemCache хранит данные в памяти
+# одного процесса и годится только для тестов и запуска в один процесс.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.memcached.PyMemcacheCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='memcached:11211'),
+    },
+    # Счётчики лимитов частоты запросов; отдельный сервер
+    # (THROTTLE_CACHE_LOCATION) защищает их от вытеснения кэшем ответов.
+    'throttle': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.memcached.PyMemcacheCache'),
+        'LOCATION': os.getenv('THROTTLE_CACHE_LOCATION', default=os.getenv('CACHE_LOCATION', default='memcached:11211')),
+        'KEY_PREFIX': 'throttle',
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -100,13 +138,27 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.ScopedWriteThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'signup': os.getenv('THROTTLE_SIGNUP', default='10/hour'),
+        'token': os.getenv('THROTTLE_TOKEN', default='20/hour'),
+        'reviews': os.getenv('THROTTLE_REVIEWS', default='60/hour'),
+        'comments': os.getenv('THROTTLE_COMMENTS', default='120/hour'),
+    },
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=1)),
 }
 
 LANGUAGE_CODE = 'ru-RU'
@@ -127,3 +179,16 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 MAX_SYMBOLS = 15
 DEFAULT_FROM_EMAIL = 'yamdb <admin@yamdb.ru>'
+DICTIONARY_CACHE_TIMEOUT = int(os.getenv('DICTIONARY_CACHE_TIMEOUT', default=3600))
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', default=300))
+SEARCH_CONFIG = 'russian'
+SLOW_REQUEST_THRESHOLD = float(os.getenv('SLOW_REQUEST_THRESHOLD', default=1))
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', default='False') == 'True'
+ASYNC_READ_THREADS = int(os.getenv('ASYNC_READ_THREADS', default=4))
+VALUES_LIST = os.getenv('VALUES_LIST', default='True') == 'True'
+EMAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv('EMAIL_QUEUE_MAX_ATTEMPTS', default=5))
+EMAIL_QUEUE_RETRY_DELAY = int(os.getenv('EMAIL_QUEUE_RETRY_DELAY', default=60))
+EMAIL_QUEUE_LEASE = int(os.getenv('EMAIL_QUEUE_LEASE', default=300))
+EMAIL_QUEUE_KEEP_DAYS = int(os.getenv('EMAIL_QUEUE_KEEP_DAYS', default=7))
+DELETION_SYNC_LIMIT = int(os.getenv('DELETION_SYNC_LIMIT', default=1000))
+DELETION_JOB_LEASE = int(os.getenv('DELETION_JOB_LEASE', default=300))
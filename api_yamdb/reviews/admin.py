@@ -1,7 +1,40 @@
-from django.contrib import admin
-from users.models import User
+from django.contrib import admin, messages
+from django.utils import timezone
 
-from .models import Category, Comment, Genre, Review, Title
+from .deletion import enqueue_large_deletion, is_large_cascade
+from .models import Category, Comment, DeletionJob, Genre, Review, Title
+
+
+class QueuedDeletionAdminMixin:
+    """
+    Удаление объектов с большим каскадом ставится в очередь задач
+    удаления (reviews.deletion): ни страница подтверждения, ни само
+    удаление не загружают зависимые отзывы и комментарии в память.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        if not any(is_large_cascade(obj) for obj in objs):
+            return super().get_deleted_objects(objs, request)
+        return (
+            [str(obj) for obj in objs],
+            {self.model._meta.verbose_name_plural: len(objs)},
+            set(),
+            [],
+        )
+
+    def delete_model(self, request, obj):
+        if enqueue_large_deletion(obj, request.user.pk) is None:
+            super().delete_model(request, obj)
+        else:
+            self.message_user(
+                request,
+                f'Удаление «{obj}» поставлено в очередь.',
+                messages.WARNING,
+            )
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
 
 
 @admin.register(Category)
@@ -17,27 +50,13 @@ class GenreAdmin(admin.ModelAdmin):
 
 
 @admin.register(Title)
-class TitleAdmin(admin.ModelAdmin):
+class TitleAdmin(QueuedDeletionAdminMixin, admin.ModelAdmin):
     """Регистрация модели Title в панели суперпользователя"""
-    list_display = ('id', 'name', 'year', 'category',)
-
-
-@admin.register(User)
-class UserAdmin(admin.ModelAdmin):
-    """Регистрация модели User в панели суперпользователя"""
-    list_display = (
-        'id',
-        'username',
-        'email',
-        'role',
-        'bio',
-        'first_name',
-        'last_name',
-    )
+    list_display = ('id', 'name', 'year', 'category', 'rating',)
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(QueuedDeletionAdminMixin, admin.ModelAdmin):
     """Регистрация модели Review в панели суперпользователя"""
     list_display = ('id', 'title_id', 'text', 'author', 'pub_date',)
 
@@ -46,3 +65,25 @@ class ReviewAdmin(admin.ModelAdmin):
 class CommentAdmin(admin.ModelAdmin):
     """Регистрация модели Comment в панели суперпользователя"""
     list_display = ('id', 'review_id', 'text', 'author', 'pub_date',)
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    """Регистрация модели DeletionJob в панели суперпользователя"""
+    list_display = (
+        'id', 'target', 'object_id', 'status', 'deleted', 'created',
+        'finished_at',
+    )
+    list_filter = ('status', 'target')
+    readonly_fields = (
+        'started_at', 'leased_until', 'finished_at', 'attempts', 'deleted',
+        'last_error',
+    )
+    actions = ('requeue',)
+
+    @admin.action(description='Повторить выбранные задачи')
+    def requeue(self, request, queryset):
+        queryset.exclude(
+            status=DeletionJob.Statuses.RUNNING,
+            leased_until__gt=timezone.now(),
+        ).update(status=DeletionJob.Statuses.QUEUED, leased_until=None)
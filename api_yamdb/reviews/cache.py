@@ -0,0 +1,128 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from api_yamdb.db.replication import primary_position
+
+from .models import Category, Genre
+
+PRIMARY_POSITION_KEY = 'replica:primary_position'
+
+
+def get_versions(names):
+    """
+    Возвращает версии наборов данных из общего кэша одним обращением.
+    Версия — время последнего изменения в наносекундах.
+    """
+    keys = [f'version:{name}' for name in names]
+    versions = cache.get_many(keys)
+    missing = {
+        key: time.time_ns() for key in keys if key not in versions
+    }
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, timeout=None)
+        versions.update(cache.get_many(list(missing)))
+    return [versions.get(key, missing.get(key)) for key in keys]
+
+
+def get_version(name):
+    return get_versions([name])[0]
+
+
+def set_versions(names):
+    """
+    Записывает новые версии. С репликами вместе с ними записывается
+    позиция журнала основной базы: реплики, которые до неё ещё
+    не дошли, не читают данные для ответов под этими версиями.
+    """
+    version = time.time_ns()
+    values = {f'version:{name}': version for name in names}
+    if settings.DATABASE_REPLICAS:
+        values[PRIMARY_POSITION_KEY] = primary_position()
+    cache.set_many(values, timeout=None)
+
+
+def bump_versions(names):
+    """
+    Помечает изменёнными наборы данных одним обращением к кэшу.
+    Внутри транзакции версии меняются сразу и ещё раз после фиксации:
+    данные, которые другой процесс прочитал до фиксации и сохранил
+    в кэше под промежуточной версией, больше не используются.
+    """
+    names = list(names)
+    if not names:
+        return
+    set_versions(names)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: set_versions(names))
+
+
+def bump_version(name):
+    """Помечает набор данных изменённым."""
+    bump_versions([name])
+
+
+class CachedDictionary:
+    """
+    Кэш небольшой справочной таблицы: список объектов и словари
+    slug → объект и pk → объект. Хранится в общем кэше и дублируется в памяти
+    процесса; актуальность проверяется по версии таблицы в общем кэше,
+    поэтому изменения видны всем процессам.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.name = model._meta.label_lower
+        self._local = (None, [], {}, {})
+
+    def _load(self, reload=False):
+        version = get_version(self.name)
+        if self._local[0] == version and not reload:
+            return self._local
+        key = f'dictionary:{self.name}:{version}'
+        objects = None if reload else cache.get(key)
+        if objects is None:
+            objects = list(self.model.objects.order_by('pk'))
+            cache.set(key, objects, settings.DICTIONARY_CACHE_TIMEOUT)
+        self._local = (
+            version, objects, {obj.slug: obj for obj in objects},
+            {obj.pk: obj for obj in objects},
+        )
+        return self._local
+
+    def all(self):
+        return self._load()[1]
+
+    def slug_map(self):
+        return self._load()[2]
+
+    def pk_map(self):
+        return self._load()[3]
+
+    def _find(self, index, key):
+        """
+        Объект из словаря index или None. Если объекта нет, словарь
+        мог устареть (его загрузили до фиксации изменения или с отстающей
+        реплики): он перечитывается из базы под текущей версией.
+        """
+        obj = self._load()[index].get(key)
+        if obj is None:
+            obj = self._load(reload=True)[index].get(key)
+        return obj
+
+    def get(self, pk):
+        return self._find(3, pk)
+
+    def get_by_slug(self, slug):
+        return self._find(2, slug)
+
+    def invalidate(self):
+        bump_version(self.name)
+        self._local = (None, [], {}, {})
+
+
+categories = CachedDictionary(Category)
+genres = CachedDictionary(Genre)
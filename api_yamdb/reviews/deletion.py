@@ -0,0 +1,222 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from users.models import User
+
+from .cache import bump_versions
+from .leaderboards import refresh_ratings
+from .models import Comment, DeletionJob, Review, Title
+
+Targets = DeletionJob.Targets
+Statuses = DeletionJob.Statuses
+
+MODELS = {
+    Targets.TITLE: Title,
+    Targets.USER: User,
+    Targets.REVIEW: Review,
+}
+
+
+def comment_condition(target, object_id):
+    """Комментарии, которые удаляются вместе с объектом."""
+    return {
+        Targets.TITLE: Q(review__title_id=object_id),
+        Targets.USER: Q(author_id=object_id) | Q(review__author_id=object_id),
+        Targets.REVIEW: Q(review_id=object_id),
+    }[target]
+
+
+def review_condition(target, object_id):
+    """Отзывы, которые удаляются вместе с объектом, или None."""
+    return {
+        Targets.TITLE: Q(title_id=object_id),
+        Targets.USER: Q(author_id=object_id),
+    }.get(target)
+
+
+def count_dependents(target, object_id, limit):
+    """Число зависимых отзывов и комментариев, но не больше limit."""
+    count = Comment.objects.filter(
+        comment_condition(target, object_id)
+    )[:limit].count()
+    reviews = review_condition(target, object_id)
+    if reviews is not None and count < limit:
+        count += Review.objects.filter(reviews)[:limit - count].count()
+    return count
+
+
+def is_large_cascade(instance):
+    """За объектом тянется больше DELETION_SYNC_LIMIT строк."""
+    limit = settings.DELETION_SYNC_LIMIT
+    return count_dependents(
+        Targets(instance._meta.model_name), instance.pk, limit + 1
+    ) > limit
+
+
+def enqueue_large_deletion(instance, requested_by_id=None):
+    """
+    Ставит удаление объекта в очередь, если у него большой каскад,
+    и возвращает задачу. Для небольших каскадов возвращает None:
+    объект удаляется сразу.
+    """
+    if not is_large_cascade(instance):
+        return None
+    target = Targets(instance._meta.model_name)
+    job = DeletionJob.objects.filter(
+        target=target,
+        object_id=instance.pk,
+        status__in=(Statuses.QUEUED, Statuses.RUNNING),
+    ).first()
+    if job is not None:
+        return job
+    return DeletionJob.objects.create(
+        target=target,
+        object_id=instance.pk,
+        requested_by_id=requested_by_id,
+    )
+
+
+def delete_comments(condition, batch_size):
+    """
+    Удаляет до batch_size комментариев одним DELETE по первичным ключам,
+    минуя сборщик каскада Django. Возвращает число удалённых.
+    """
+    with transaction.atomic():
+        rows = list(
+            Comment.objects.filter(condition).order_by('pk').values_list(
+                'pk', 'review_id'
+            )[:batch_size]
+        )
+        Comment.objects.filter(
+            pk__in=[pk for pk, _ in rows]
+        )._raw_delete(Comment.objects.db)
+    bump_versions({f'reviews.comment:{review_id}' for _, review_id in rows})
+    return len(rows)
+
+
+def delete_reviews(condition, batch_size):
+    """
+    Удаляет до batch_size отзывов вместе с их комментариями и в той же
+    транзакции вычитает их из счётчиков, рейтинга, распределения оценок
+    и рейтингов произведений. Строки пачки блокируются до конца
+    транзакции, чтобы одновременная правка оценки не разошлась
+    с вычитаемой. Возвращает число удалённых строк.
+    """
+    with transaction.atomic():
+        rows = list(
+            Review.objects.select_for_update().filter(condition).order_by(
+                'pk'
+            ).values_list('pk', 'title_id', 'score')[:batch_size]
+        )
+        review_ids = [pk for pk, _, _ in rows]
+        deleted = Comment.objects.filter(
+            review_id__in=review_ids
+        )._raw_delete(Comment.objects.db)
+        deleted += Review.objects.filter(
+            pk__in=review_ids
+        )._raw_delete(Review.objects.db)
+        scores = defaultdict(Counter)
+        for _, title_id, score in rows:
+            scores[title_id][score] += 1
+        for title_id, counts in scores.items():
+            Title.objects.filter(pk=title_id).apply_review_delta(
+                -sum(counts.values()),
+                -sum(score * count for score, count in counts.items()),
+                {score: -count for score, count in counts.items()},
+            )
+        refresh_ratings(list(scores))
+    if rows:
+        bump_versions(
+            [f'reviews.review:{title_id}' for title_id in scores]
+            + [f'reviews.title:{title_id}' for title_id in scores]
+            + [f'reviews.comment:{pk}' for pk in review_ids]
+            + ['reviews.rating']
+        )
+    return deleted
+
+
+def run_job(job, batch_size):
+    """
+    Удаляет зависимые комментарии и отзывы пачками по batch_size строк,
+    затем сам объект обычным delete(): его каскад к этому моменту мал,
+    а сигналы удаления срабатывают как обычно. После каждой пачки
+    аренда задачи продлевается. Повторный запуск продолжает с места
+    остановки.
+    """
+    stages = [(delete_comments, comment_condition(job.target, job.object_id))]
+    reviews = review_condition(job.target, job.object_id)
+    if reviews is not None:
+        stages.append((delete_reviews, reviews))
+    for delete, condition in stages:
+        while True:
+            deleted = delete(condition, batch_size)
+            if not deleted:
+                break
+            DeletionJob.objects.filter(pk=job.pk).update(
+                deleted=F('deleted') + deleted,
+                leased_until=lease_end(),
+            )
+    with transaction.atomic():
+        instance = MODELS[job.target].objects.filter(
+            pk=job.object_id
+        ).first()
+        if instance is not None:
+            deleted, _ = instance.delete()
+            DeletionJob.objects.filter(pk=job.pk).update(
+                deleted=F('deleted') + deleted
+            )
+
+
+def lease_end():
+    """Срок, до которого задача занята обработчиком."""
+    return timezone.now() + timedelta(seconds=settings.DELETION_JOB_LEASE)
+
+
+def claim_job():
+    """
+    Берёт первую задачу из очереди или задачу, обработчик которой
+    не продлил аренду (DELETION_JOB_LEASE) и, видимо, завершился.
+    Строка блокируется с пропуском уже заблокированных, поэтому
+    несколько обработчиков не возьмут одну задачу дважды.
+    """
+    with transaction.atomic():
+        job = DeletionJob.objects.select_for_update(skip_locked=True).filter(
+            Q(status=Statuses.QUEUED)
+            | Q(status=Statuses.RUNNING, leased_until__lt=timezone.now())
+        ).first()
+        if job is None:
+            return None
+        job.status = Statuses.RUNNING
+        job.started_at = timezone.now()
+        job.leased_until = lease_end()
+        job.attempts += 1
+        job.save(update_fields=(
+            'status', 'started_at', 'leased_until', 'attempts'
+        ))
+    return job
+
+
+def run_next_deletion_job(batch_size=1000):
+    """Выполняет одну задачу из очереди; возвращает её или None."""
+    job = claim_job()
+    if job is None:
+        return None
+    try:
+        run_job(job, batch_size)
+    except Exception as error:
+        job.status = Statuses.FAILED
+        job.last_error = repr(error)
+    else:
+        job.status = Statuses.DONE
+        job.last_error = ''
+    job.finished_at = timezone.now()
+    job.leased_until = None
+    job.save(update_fields=(
+        'status', 'last_error', 'finished_at', 'leased_until'
+    ))
+    job.refresh_from_db(fields=('deleted',))
+    return job
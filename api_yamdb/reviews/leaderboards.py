@@ -0,0 +1,103 @@
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from .models import LeaderboardEntry, Title, TitleGenre
+
+OVERALL = ''
+
+
+def category_scope(category_id):
+    return f'category:{category_id}'
+
+
+def genre_scope(genre_id):
+    return f'genre:{genre_id}'
+
+
+def refresh_ratings(title_ids=None):
+    """
+    Копирует хранимые рейтинг и число отзывов произведений во все их
+    места в рейтингах одним UPDATE.
+    """
+    entries = LeaderboardEntry.objects.all()
+    if title_ids is not None:
+        entries = entries.filter(title_id__in=title_ids)
+    titles = Title.objects.filter(pk=OuterRef('title_id'))
+    return entries.update(
+        rating=Subquery(titles.values('rating')),
+        reviews_count=Subquery(titles.values('reviews_count')),
+    )
+
+
+def sync_title(title_id):
+    """Приводит рейтинги произведения к его категории и жанрам."""
+    title = Title.objects.filter(pk=title_id).values(
+        'category_id', 'rating', 'reviews_count'
+    ).first()
+    if title is None:
+        return
+    scopes = {OVERALL} | {
+        genre_scope(genre_id) for genre_id in TitleGenre.objects.filter(
+            title_id=title_id
+        ).values_list('genre_id', flat=True)
+    }
+    if title['category_id'] is not None:
+        scopes.add(category_scope(title['category_id']))
+    LeaderboardEntry.objects.filter(title_id=title_id).exclude(
+        scope__in=scopes
+    ).delete()
+    LeaderboardEntry.objects.bulk_create(
+        [
+            LeaderboardEntry(
+                scope=scope, title_id=title_id, rating=title['rating'],
+                reviews_count=title['reviews_count'],
+            )
+            for scope in scopes
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def remove_scope(scope):
+    LeaderboardEntry.objects.filter(scope=scope).delete()
+
+
+def build_entries():
+    """Все места в рейтингах по текущим произведениям и их жанрам."""
+    titles = Title.objects.values_list(
+        'pk', 'category_id', 'rating', 'reviews_count'
+    ).order_by().iterator()
+    for title_id, category_id, rating, reviews_count in titles:
+        yield LeaderboardEntry(
+            scope=OVERALL, title_id=title_id, rating=rating,
+            reviews_count=reviews_count,
+        )
+        if category_id is not None:
+            yield LeaderboardEntry(
+                scope=category_scope(category_id), title_id=title_id,
+                rating=rating, reviews_count=reviews_count,
+            )
+    title_genres = TitleGenre.objects.values_list(
+        'title_id', 'genre_id', 'title__rating', 'title__reviews_count'
+    ).order_by().iterator()
+    yield from (
+        LeaderboardEntry(
+            scope=genre_scope(genre_id), title_id=title_id, rating=rating,
+            reviews_count=reviews_count,
+        )
+        for title_id, genre_id, rating, reviews_count in title_genres
+    )
+
+
+@transaction.atomic
+def rebuild_leaderboards(batch_size=1000):
+    """Полностью пересобирает рейтинги; возвращает число мест."""
+    LeaderboardEntry.objects.all().delete()
+    entries = build_entries()
+    created = 0
+    for batch in iter(lambda: list(islice(entries, batch_size)), []):
+        LeaderboardEntry.objects.bulk_create(batch)
+        created += len(batch)
+    return created
@@ -0,0 +1,171 @@
+from collections import namedtuple
+from contextlib import contextmanager
+from csv import DictReader
+from itertools import islice
+
+import django
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
+from users.models import User
+
+CsvSource = namedtuple('CsvSource', ('name', 'filename', 'model', 'columns'))
+
+CSV_SOURCES = (
+    CsvSource('category', 'category.csv', Category, {
+        'id': 'id', 'name': 'name', 'slug': 'slug',
+    }),
+    CsvSource('genre', 'genre.csv', Genre, {
+        'id': 'id', 'name': 'name', 'slug': 'slug',
+    }),
+    CsvSource('titles', 'titles.csv', Title, {
+        'id': 'id', 'name': 'name', 'year': 'year',
+        'category': 'category_id',
+    }),
+    CsvSource('genre_title', 'genre_title.csv', TitleGenre, {
+        'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id',
+    }),
+    CsvSource('users', 'users.csv', User, {
+        'id': 'id', 'username': 'username', 'email': 'email',
+        'role': 'role', 'bio': 'bio', 'first_name': 'first_name',
+        'last_name': 'last_name',
+    }),
+    CsvSource('review', 'review.csv', Review, {
+        'id': 'id', 'title_id': 'title_id', 'text': 'text',
+        'author': 'author_id', 'score': 'score', 'pub_date': 'pub_date',
+    }),
+    CsvSource('comments', 'comments.csv', Comment, {
+        'id': 'id', 'review_id': 'review_id', 'text': 'text',
+        'author': 'author_id', 'pub_date': 'pub_date',
+    }),
+)
+
+
+def dependency_levels(sources):
+    """
+    Раскладывает файлы по уровням графа зависимостей, построенного
+    по внешним ключам моделей. Файлы одного уровня не зависят друг
+    от друга и могут загружаться параллельно.
+    """
+    by_model = {source.model: source for source in sources}
+    dependencies = {
+        source.name: {
+            by_model[field.related_model].name
+            for field in source.model._meta.concrete_fields
+            if field.many_to_one
+            and field.related_model in by_model
+            and field.related_model is not source.model
+        }
+        for source in sources
+    }
+    levels = []
+    loaded = set()
+    while len(loaded) < len(sources):
+        level = [
+            source for source in sources
+            if source.name not in loaded
+            and dependencies[source.name] <= loaded
+        ]
+        if not level:
+            raise ValueError('Циклическая зависимость между файлами')
+        levels.append(level)
+        loaded.update(source.name for source in level)
+    return levels
+
+
+def read_chunks(path, batch_size):
+    """Построчно читает CSV файл и отдаёт строки пачками."""
+    with open(path, encoding='utf8', newline='') as csv_file:
+        rows = DictReader(csv_file)
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def build_objects(source, rows):
+    """Создаёт объекты модели из строк CSV, приводя значения к типам полей."""
+    fields = {
+        column: source.model._meta.get_field(attname)
+        for column, attname in source.columns.items()
+    }
+    objects = []
+    for row in rows:
+        values = {}
+        for column, field in fields.items():
+            value = row[column]
+            if value == '' and field.null:
+                value = None
+            values[field.attname] = field.to_python(value)
+        objects.append(source.model(**values))
+    return objects
+
+
+@contextmanager
+def preserve_auto_now(model):
+    """Сохраняет даты из файла вместо подстановки auto_now_add."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def load_chunk(source, rows, update_existing=False):
+    """
+    Загружает пачку строк одним bulk_create.
+    Уже существующие записи пропускаются либо обновляются bulk_update.
+    Возвращает количество созданных, обновлённых и пропущенных записей.
+    """
+    model = source.model
+    objects = build_objects(source, rows)
+    existing = set(model.objects.filter(
+        pk__in=[obj.pk for obj in objects]
+    ).values_list('pk', flat=True))
+    new_objects = [obj for obj in objects if obj.pk not in existing]
+    old_objects = [obj for obj in objects if obj.pk in existing]
+    with preserve_auto_now(model):
+        model.objects.bulk_create(new_objects)
+    if not update_existing:
+        return len(new_objects), 0, len(old_objects)
+    if old_objects:
+        fields = [
+            model._meta.get_field(attname).name
+            for attname in source.columns.values() if attname != 'id'
+        ]
+        model.objects.bulk_update(old_objects, fields)
+    return len(new_objects), len(old_objects), 0
+
+
+def reset_sequences(models):
+    """Сдвигает последовательности первичных ключей за загруженные id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def init_worker():
+    """
+    Подготавливает процесс-загрузчик: каждый процесс открывает
+    собственное соединение с базой данных.
+    """
+    if not apps.ready:
+        django.setup()
+
+
+def load_chunk_in_worker(source_name, rows, update_existing):
+    """Загружает пачку строк в отдельной транзакции процесса-загрузчика."""
+    source = next(
+        source for source in CSV_SOURCES if source.name == source_name
+    )
+    with transaction.atomic():
+        return load_chunk(source, rows, update_existing)
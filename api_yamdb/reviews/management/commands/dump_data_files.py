@@ -0,0 +1,125 @@
+import gzip
+import json
+import os
+import time
+from csv import writer
+from datetime import datetime
+from datetime import time as datetime_time
+
+from django.core.management import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ._private import CSV_SOURCES
+
+
+def format_value(value):
+    """Приводит значение к виду, принятому в файлах static/data."""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        value = timezone.localtime(value, timezone.utc)
+        return value.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+    return value
+
+
+def parse_since(value):
+    """Разбирает дату или дату со временем для параметра --since."""
+    since = parse_datetime(value)
+    if since is None:
+        date = parse_date(value)
+        if date is None:
+            raise CommandError(f'Invalid --since value: {value}')
+        since = datetime.combine(date, datetime_time.min)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, timezone.utc)
+    return since
+
+
+class Command(BaseCommand):
+    """Выгрузка данных из базы данных в CSV файлы формата static/data"""
+    help = "Dumps data to csv or json lines files in static/data layout"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir',
+            required=True,
+            help='Directory to write files to',
+        )
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=[source.name for source in CSV_SOURCES],
+            help='Dump only the given files',
+        )
+        parser.add_argument(
+            '--format',
+            choices=('csv', 'jsonl'),
+            default='csv',
+            help='Output format',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Compress output files with gzip',
+        )
+        parser.add_argument(
+            '--since',
+            type=parse_since,
+            help='Dump only reviews and comments published after this date',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Rows fetched from the database cursor at a time',
+        )
+
+    def handle(self, *args, **options):
+        os.makedirs(options['dir'], exist_ok=True)
+        for source in CSV_SOURCES:
+            if not options['only'] or source.name in options['only']:
+                self.dump_source(source, options)
+
+    def get_queryset(self, source, options):
+        queryset = source.model.objects.order_by('pk')
+        field_names = {
+            field.name for field in source.model._meta.concrete_fields
+        }
+        if options['since'] and 'pub_date' in field_names:
+            queryset = queryset.filter(pub_date__gte=options['since'])
+        return queryset.values_list(*source.columns.values()).iterator(
+            chunk_size=options['chunk_size']
+        )
+
+    def open_file(self, source, options):
+        name, _ = os.path.splitext(source.filename)
+        path = os.path.join(options['dir'], f'{name}.{options["format"]}')
+        if options['gzip']:
+            return gzip.open(f'{path}.gz', 'wt', encoding='utf8', newline='')
+        return open(path, 'w', encoding='utf8', newline='')
+
+    def dump_source(self, source, options):
+        """Построчно выгружает таблицу через серверный курсор."""
+        started = time.monotonic()
+        columns = list(source.columns)
+        rows = 0
+        with self.open_file(source, options) as output:
+            if options['format'] == 'csv':
+                csv_writer = writer(output, lineterminator='\n')
+                csv_writer.writerow(columns)
+            for values in self.get_queryset(source, options):
+                values = [format_value(value) for value in values]
+                if options['format'] == 'csv':
+                    csv_writer.writerow(values)
+                else:
+                    output.write(json.dumps(
+                        dict(zip(columns, values)), ensure_ascii=False
+                    ))
+                    output.write('\n')
+                rows += 1
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{source.filename}: {rows} rows '
+            f'({rows / max(elapsed, 1e-6):.0f} rows/s)'
+        )
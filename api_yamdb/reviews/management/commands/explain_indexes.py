@@ -0,0 +1,114 @@
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from reviews.models import Comment, Genre, Review, Title, TitleGenre
+
+BASELINE_INDEXES = (
+    (Review, models.Index(fields=('title',), name='explain_review_title')),
+    (Comment, models.Index(fields=('review',), name='explain_comment_rev')),
+    (TitleGenre, models.Index(fields=('title',), name='explain_tg_title')),
+    (TitleGenre, models.Index(fields=('genre',), name='explain_tg_genre')),
+)
+
+
+class RollbackExplainError(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Планы запросов основных сценариев API с составными индексами
+    и без них. Индексы удаляются внутри транзакции, которая затем
+    откатывается, поэтому команда не меняет схему базы данных. Но до
+    отката таблицы заблокированы (ACCESS EXCLUSIVE), поэтому без DEBUG
+    команда запускается только с --i-know.
+    """
+    help = "Shows EXPLAIN plans of the main API queries before and after " \
+           "the composite indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Run EXPLAIN ANALYZE (PostgreSQL only)',
+        )
+        parser.add_argument(
+            '--i-know',
+            action='store_true',
+            help='Run with DEBUG off: dropping the indexes locks the tables '
+                 'for the whole run',
+        )
+
+    def get_queries(self):
+        title = Title.objects.filter(
+            category__isnull=False, year__isnull=False
+        ).order_by('-reviews_count').first()
+        review = Review.objects.annotate(
+            comments_count=models.Count('comments')
+        ).order_by('-comments_count').first()
+        genre = Genre.objects.first()
+        if title is None or review is None or genre is None:
+            raise CommandError('Seed the database first (load_data_files)')
+        return {
+            'reviews of a title': Review.objects.filter(
+                title_id=title.id
+            ).order_by('-pub_date', '-id')[:10],
+            'comments of a review': Comment.objects.filter(
+                review_id=review.id
+            ).order_by('-pub_date', '-id')[:10],
+            'titles by category, genre and year': Title.objects.filter(
+                category__slug=title.category.slug,
+                genre__slug=genre.slug,
+                year=title.year,
+            )[:10],
+            'genres of a title': TitleGenre.objects.filter(
+                title_id=title.id
+            ),
+            'titles of a genre': TitleGenre.objects.filter(
+                genre_id=genre.id
+            ),
+            'rating of a title': Review.objects.filter(
+                title_id=title.id
+            ).values('title').annotate(rating=models.Avg('score')),
+        }
+
+    def explain(self, queries, options):
+        explain_options = {'analyze': True} if options['analyze'] else {}
+        return {
+            name: queryset.explain(**explain_options)
+            for name, queryset in queries.items()
+        }
+
+    def drop_composite_indexes(self):
+        schema_editor = connection.schema_editor()
+        for model in (Title, TitleGenre, Review, Comment):
+            for index in model._meta.indexes:
+                schema_editor.execute(index.remove_sql(model, schema_editor))
+        for model, index in BASELINE_INDEXES:
+            schema_editor.execute(index.create_sql(model, schema_editor))
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['i_know']:
+            raise CommandError(
+                'The command drops indexes in a transaction and locks the '
+                'tables until it ends. Run it on a copy of the database '
+                'with DEBUG on, or pass --i-know'
+            )
+        queries = self.get_queries()
+        after = self.explain(queries, options)
+        try:
+            with transaction.atomic():
+                self.drop_composite_indexes()
+                before = self.explain(queries, options)
+                raise RollbackExplainError
+        except RollbackExplainError:
+            pass
+        for name in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write('  before:')
+            self.stdout.write(self.indent(before[name]))
+            self.stdout.write('  after:')
+            self.stdout.write(self.indent(after[name]))
+
+    def indent(self, plan):
+        return '\n'.join(f'    {line}' for line in plan.splitlines())
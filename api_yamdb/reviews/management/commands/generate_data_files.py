@@ -0,0 +1,157 @@
+import os
+import random
+import time
+from csv import DictReader, writer
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.utils import timezone
+
+from ._private import CSV_SOURCES
+from .dump_data_files import format_value
+
+
+class Command(BaseCommand):
+    """
+    Генерация синтетических данных для нагрузочного тестирования.
+    Тексты берутся из файлов static/data, файлы пишутся построчно
+    в том же формате, поэтому их можно загрузить load_data_files.
+    """
+    help = "Generates scaled csv files in static/data layout"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', required=True)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=50)
+        parser.add_argument('--titles', type=int, default=100000)
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--reviews', type=int, default=10000000)
+        parser.add_argument('--comments', type=int, default=1000000)
+        parser.add_argument('--genres-per-title', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.validate(options)
+        self.random = random.Random(options['seed'])
+        self.texts = self.load_texts()
+        os.makedirs(options['dir'], exist_ok=True)
+        for source in CSV_SOURCES:
+            self.write(source, options)
+
+    def validate(self, options):
+        names = (
+            'categories', 'genres', 'titles', 'users', 'reviews', 'comments',
+            'genres_per_title',
+        )
+        for name in names:
+            if options[name] < 0:
+                raise CommandError(
+                    f'--{name.replace("_", "-")} must not be negative'
+                )
+        if options['titles'] and not options['categories']:
+            raise CommandError('Titles need at least one category')
+        if options['genres_per_title'] > options['genres']:
+            raise CommandError('--genres-per-title exceeds --genres')
+        if options['reviews'] > options['titles'] * options['users']:
+            raise CommandError(
+                'Each user can review a title once: '
+                '--reviews must not exceed --titles * --users'
+            )
+        if options['comments'] and not (
+            options['reviews'] and options['users']
+        ):
+            raise CommandError('Comments need at least one review and user')
+
+    def load_texts(self):
+        path = os.path.join(settings.BASE_DIR, 'static', 'data')
+        texts = {}
+        for filename, column in (
+            ('titles.csv', 'name'), ('review.csv', 'text'),
+            ('comments.csv', 'text'),
+        ):
+            with open(
+                os.path.join(path, filename), encoding='utf8', newline=''
+            ) as csv_file:
+                texts[filename] = [row[column] for row in DictReader(csv_file)]
+        return texts
+
+    def write(self, source, options):
+        started = time.monotonic()
+        rows = getattr(self, f'generate_{source.name}')(options)
+        count = 0
+        with open(
+            os.path.join(options['dir'], source.filename),
+            'w', encoding='utf8', newline=''
+        ) as csv_file:
+            csv_writer = writer(csv_file, lineterminator='\n')
+            csv_writer.writerow(source.columns)
+            for row in rows:
+                csv_writer.writerow(format_value(value) for value in row)
+                count += 1
+        self.stdout.write(
+            f'{source.filename}: {count} rows '
+            f'in {time.monotonic() - started:.1f}s'
+        )
+
+    def random_date(self):
+        start = datetime(2015, 1, 1, tzinfo=timezone.utc)
+        return start + timedelta(seconds=self.random.randrange(2 * 10 ** 8))
+
+    def generate_category(self, options):
+        for pk in range(1, options['categories'] + 1):
+            yield pk, f'Категория {pk}', f'category-{pk}'
+
+    def generate_genre(self, options):
+        for pk in range(1, options['genres'] + 1):
+            yield pk, f'Жанр {pk}', f'genre-{pk}'
+
+    def generate_titles(self, options):
+        names = self.texts['titles.csv']
+        for pk in range(1, options['titles'] + 1):
+            yield (
+                pk,
+                f'{names[pk % len(names)]} {pk}',
+                self.random.randint(1900, 2022),
+                self.random.randint(1, options['categories']),
+            )
+
+    def generate_genre_title(self, options):
+        pk = 0
+        for title_id in range(1, options['titles'] + 1):
+            for genre_id in self.random.sample(
+                range(1, options['genres'] + 1), options['genres_per_title']
+            ):
+                pk += 1
+                yield pk, title_id, genre_id
+
+    def generate_users(self, options):
+        roles = ('user',) * 18 + ('moderator', 'admin')
+        for pk in range(1, options['users'] + 1):
+            yield (
+                pk, f'user{pk}', f'user{pk}@yamdb.fake',
+                self.random.choice(roles), '', '', '',
+            )
+
+    def generate_review(self, options):
+        texts = self.texts['review.csv']
+        for pk in range(1, options['reviews'] + 1):
+            yield (
+                pk,
+                (pk - 1) % options['titles'] + 1,
+                texts[pk % len(texts)],
+                (pk - 1) // options['titles'] + 1,
+                self.random.randint(1, 10),
+                self.random_date(),
+            )
+
+    def generate_comments(self, options):
+        texts = self.texts['comments.csv']
+        for pk in range(1, options['comments'] + 1):
+            yield (
+                pk,
+                self.random.randint(1, options['reviews']),
+                texts[pk % len(texts)],
+                self.random.randint(1, options['users']),
+                self.random_date(),
+            )
@@ -1,91 +1,156 @@
-from csv import DictReader
-
-from django.core.management import BaseCommand
-from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
-from users.models import User
-
-
-class Command(BaseCommand):
-    """Загрузка данных из CSV файлов из папки static/data в базу данных"""
-    help = "Loads data from csv files in static/data"
-
-    def handle(self, *args, **options):
-        for categories in DictReader(
-            open('static/data/category.csv', encoding="utf8")
-        ):
-            category = Category(
-                id=categories['id'],
-                name=categories['name'],
-                slug=categories['slug'],
-            )
-            category.save()
-
-        for genres in DictReader(
-            open('static/data/genre.csv', encoding="utf8")
-        ):
-            genre = Genre(
-                id=genres['id'],
-                name=genres['name'],
-                slug=genres['slug'],
-            )
-            genre.save()
-
-        for titles in DictReader(
-            open('static/data/titles.csv', encoding="utf8")
-        ):
-            title = Title(
-                id=titles['id'],
-                name=titles['name'],
-                year=titles['year'],
-                category_id=titles['category'],
-            )
-            title.save()
-
-        for row in DictReader(
-            open('static/data/genre_title.csv', encoding="utf8")
-        ):
-            titlegenre = TitleGenre(
-                id=row['id'],
-                title_id=row['title_id'],
-                genre_id=row['genre_id'],
-            )
-            titlegenre.save()
-
-        for users in DictReader(
-            open('static/data/users.csv', encoding="utf8")
-        ):
-            user = User(
-                id=users['id'],
-                username=users['username'],
-                email=users['email'],
-                role=users['role'],
-                bio=users['bio'],
-                first_name=users['first_name'],
-                last_name=users['last_name'],
-            )
-            user.save()
-
-        for reviews in DictReader(
-            open('static/data/review.csv', encoding="utf8")
-        ):
-            review = Review(
-                id=reviews['id'],
-                title_id=reviews['title_id'],
-                text=reviews['text'],
-                author_id=reviews['author'],
-                score=reviews['score'],
-                pub_date=reviews['pub_date'],
-            )
-            review.save()
-
-        for comments in DictReader(
-            open('static/data/comments.csv', encoding="utf8")
-        ):
-            comment = Comment(
-                id=comments['id'],
-                review_id=comments['review_id'],
-                text=comments['text'],
-                author_id=comments['author'],
-                pub_date=comments['pub_date'],
-            )
-            comment.save()
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from reviews.cache import bump_version
+from reviews.leaderboards import rebuild_leaderboards
+from reviews.models import Review, Title, TitleGenre
+
+from api_yamdb.db import close_all
+
+from ._private import (CSV_SOURCES, dependency_levels, init_worker, load_chunk,
+                       load_chunk_in_worker, read_chunks, reset_sequences)
+
+
+class Command(BaseCommand):
+    """Загрузка данных из CSV файлов из папки static/data в базу данных"""
+    help = "Loads data from csv files in static/data"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Directory with csv files',
+        )
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=[source.name for source in CSV_SOURCES],
+            help='Load only the given files',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk insert',
+        )
+        parser.add_argument(
+            '--update-existing',
+            action='store_true',
+            help='Update rows that already exist instead of skipping them',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of loader processes, each with its own connection',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size and --workers must be positive')
+        sources = [
+            source for source in CSV_SOURCES
+            if not options['only'] or source.name in options['only']
+        ]
+        for source in sources:
+            if not os.path.exists(self.get_path(source, options)):
+                raise CommandError(
+                    f'File not found: {self.get_path(source, options)}'
+                )
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            self.stderr.write(
+                'SQLite does not support concurrent writers, '
+                'loading in a single process'
+            )
+            options['workers'] = 1
+        if options['workers'] > 1:
+            self.load_parallel(sources, options)
+        else:
+            for source in sources:
+                self.load_source(source, options)
+        reset_sequences([source.model for source in sources])
+        self.refresh_derived({source.model for source in sources})
+
+    def refresh_derived(self, models):
+        """Обновляет данные, которые при загрузке не поддерживаются."""
+        for model in models:
+            bump_version(model._meta.label_lower)
+        if Title in models:
+            Title.objects.update_search_vector()
+        if Review in models:
+            Title.objects.rebuild_ratings()
+            bump_version('reviews.title')
+        if models & {Title, TitleGenre, Review}:
+            rebuild_leaderboards()
+
+    def get_path(self, source, options):
+        return os.path.join(options['dir'], source.filename)
+
+    def load_source(self, source, options):
+        """Загружает файл целиком в одной транзакции."""
+        started = time.monotonic()
+        counts = Counter()
+        with transaction.atomic():
+            for rows in read_chunks(
+                self.get_path(source, options), options['batch_size']
+            ):
+                counts.update(dict(zip(
+                    ('created', 'updated', 'skipped'),
+                    load_chunk(source, rows, options['update_existing'])
+                )))
+        self.report(source, counts, time.monotonic() - started)
+
+    def load_parallel(self, sources, options):
+        """
+        Загружает файлы по уровням зависимостей в пуле процессов.
+        Пачки строк файлов одного уровня загружаются одновременно,
+        каждая в своей транзакции.
+        """
+        close_all()
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=init_worker
+        ) as executor:
+            for level in dependency_levels(sources):
+                self.load_level(executor, level, options)
+
+    def load_level(self, executor, level, options):
+        started = time.monotonic()
+        counts = {source.name: Counter() for source in level}
+        pending = {}
+        max_pending = options['workers'] * 2
+        for source in level:
+            for rows in read_chunks(
+                self.get_path(source, options), options['batch_size']
+            ):
+                if len(pending) >= max_pending:
+                    self.collect(pending, counts, FIRST_COMPLETED)
+                future = executor.submit(
+                    load_chunk_in_worker,
+                    source.name, rows, options['update_existing']
+                )
+                pending[future] = source.name
+        while pending:
+            self.collect(pending, counts, FIRST_COMPLETED)
+        elapsed = time.monotonic() - started
+        for source in level:
+            self.report(source, counts[source.name], elapsed)
+
+    def collect(self, pending, counts, return_when):
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            counts[pending.pop(future)].update(dict(zip(
+                ('created', 'updated', 'skipped'), future.result()
+            )))
+
+    def report(self, source, counts, elapsed):
+        total = sum(counts.values())
+        self.stdout.write(
+            f'{source.filename}: created {counts["created"]}, '
+            f'updated {counts["updated"]}, skipped {counts["skipped"]} '
+            f'({total / max(elapsed, 1e-6):.0f} rows/s)'
+        )
@@ -0,0 +1,23 @@
+from django.core.management import BaseCommand, CommandError
+from reviews.cache import bump_version
+from reviews.leaderboards import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    """Полная пересборка рейтингов произведений по категориям и жанрам"""
+    help = "Rebuilds title leaderboards from stored ratings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Leaderboard entries per INSERT',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        created = rebuild_leaderboards(options['batch_size'])
+        bump_version('reviews.title')
+        self.stdout.write(f'Leaderboard entries: {created}')
@@ -0,0 +1,17 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from reviews.cache import bump_versions
+from reviews.leaderboards import refresh_ratings
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """Пересчёт хранимых рейтингов произведений по таблице отзывов"""
+    help = "Rebuilds stored review counts and ratings of titles"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Title.objects.rebuild_ratings()
+            refresh_ratings()
+            bump_versions(['reviews.title', 'reviews.rating'])
+        self.stdout.write(f'Updated titles: {updated}')
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+from reviews.deletion import run_next_deletion_job
+
+
+class Command(BaseCommand):
+    """Выполнение задач удаления из очереди"""
+    help = "Runs queued cascade deletions in bounded batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per statement and transaction',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the queue instead of exiting when it is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1,
+            help='Seconds to wait when the queue is empty (with --loop)',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        while True:
+            job = run_next_deletion_job(options['batch_size'])
+            if job is not None:
+                self.stdout.write(
+                    f'{job.target} {job.object_id}: {job.status}, '
+                    f'deleted rows: {job.deleted}'
+                )
+                if job.last_error:
+                    self.stderr.write(job.last_error)
+            elif not options['loop']:
+                break
+            else:
+                time.sleep(options['interval'])
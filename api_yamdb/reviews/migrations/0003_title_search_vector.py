@@ -0,0 +1,49 @@
+# Generated by Django 3.2 on 2026-10-18 12:07
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+SEARCH_INDEX = GinIndex(
+    fields=['search_vector'], name='reviews_title_search_gin'
+)
+
+
+def create_search_index(apps, schema_editor):
+    """GIN-индекс и заполнение вектора доступны только в PostgreSQL."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Title = apps.get_model('reviews', 'Title')
+    schema_editor.add_index(Title, SEARCH_INDEX)
+    Title.objects.update(
+        search_vector=SearchVector(
+            'name', weight='A', config=settings.SEARCH_CONFIG
+        ) + SearchVector(
+            'description', weight='B', config=settings.SEARCH_CONFIG
+        )
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Title = apps.get_model('reviews', 'Title')
+    schema_editor.remove_index(Title, SEARCH_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_title_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 3.2 on 2026-10-18 12:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_leaderboards(apps, schema_editor):
+    """Заполняет рейтинги по уже сохранённым произведениям."""
+    Title = apps.get_model('reviews', 'Title')
+    TitleGenre = apps.get_model('reviews', 'TitleGenre')
+    LeaderboardEntry = apps.get_model('reviews', 'LeaderboardEntry')
+    titles = {
+        pk: (category_id, rating, reviews_count)
+        for pk, category_id, rating, reviews_count in Title.objects.values_list(
+            'pk', 'category_id', 'rating', 'reviews_count'
+        )
+    }
+    scopes = [
+        (f'genre:{genre_id}', title_id)
+        for title_id, genre_id in TitleGenre.objects.values_list(
+            'title_id', 'genre_id'
+        )
+    ]
+    for pk, (category_id, _, _) in titles.items():
+        scopes.append(('', pk))
+        if category_id is not None:
+            scopes.append((f'category:{category_id}', pk))
+    LeaderboardEntry.objects.bulk_create(
+        [
+            LeaderboardEntry(
+                scope=scope, title_id=title_id, rating=titles[title_id][1],
+                reviews_count=titles[title_id][2],
+            )
+            for scope, title_id in scopes
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(blank=True, max_length=32, verbose_name='Рейтинг')),
+                ('rating', models.FloatField(null=True, verbose_name='Рейтинг произведения')),
+                ('reviews_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Места в рейтингах',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['scope', '-rating', 'title'], name='leaderboard_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['scope', '-reviews_count', 'title'], name='leaderboard_reviews_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('scope', 'title'), name='unique_leaderboard_scope_title'),
+        ),
+        migrations.RunPython(build_leaderboards, migrations.RunPython.noop),
+    ]
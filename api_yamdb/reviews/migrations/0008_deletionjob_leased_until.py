@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_deletionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deletionjob',
+            name='leased_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Занято обработчиком до'),
+        ),
+    ]
@@ -1,6 +1,11 @@
 from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, SearchVectorField)
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models import Avg, Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
 from users.models import User
 
 from .validators import validate_date, validate_lenght
@@ -46,6 +51,107 @@ class Genre(models.Model):
         return self.slug
 
 
+SCORES = range(1, 11)
+
+
+def score_count_field(score):
+    """Имя поля произведения со счётчиком отзывов с оценкой score."""
+    return f'score_{score}_count'
+
+
+def score_counter(score):
+    return models.PositiveIntegerField(
+        f'Отзывов с оценкой {score}',
+        default=0,
+        editable=False,
+    )
+
+
+class TitleQuerySet(models.QuerySet):
+    """Запросы к произведениям с поддержкой хранимого рейтинга."""
+
+    def apply_review_delta(self, count_delta, score_delta,
+                           score_counts=None):
+        """
+        Атомарно изменяет счётчики отзывов и оценок и пересчитывает
+        рейтинг одним UPDATE, без агрегации по таблице отзывов.
+        score_counts: изменения счётчиков оценок, {оценка: изменение}.
+        """
+        reviews_count = F('reviews_count') + count_delta
+        score_sum = F('score_sum') + score_delta
+        counters = {
+            score_count_field(score): F(score_count_field(score)) + delta
+            for score, delta in (score_counts or {}).items() if delta
+        }
+        return self.update(
+            reviews_count=reviews_count,
+            score_sum=score_sum,
+            rating=Cast(score_sum, models.FloatField()) / NullIf(
+                reviews_count, 0
+            ),
+            **counters,
+        )
+
+    def rebuild_ratings(self):
+        """Пересчитывает хранимые рейтинги по таблице отзывов."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            reviews_count=Coalesce(
+                Subquery(reviews.annotate(value=Count('pk')).values('value')),
+                0,
+            ),
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(value=Sum('score')).values('value')),
+                0,
+            ),
+            rating=Subquery(
+                reviews.annotate(value=Avg('score')).values('value')
+            ),
+            **{
+                score_count_field(score): Coalesce(
+                    Subquery(reviews.annotate(
+                        value=Count('pk', filter=Q(score=score))
+                    ).values('value')),
+                    0,
+                )
+                for score in SCORES
+            },
+        )
+
+    def supports_full_text_search(self):
+        return connections[self.db].vendor == 'postgresql'
+
+    def update_search_vector(self):
+        """Обновляет поисковый вектор по названию и описанию."""
+        if not self.supports_full_text_search():
+            return 0
+        return self.update(
+            search_vector=SearchVector(
+                'name', weight='A', config=settings.SEARCH_CONFIG
+            ) + SearchVector(
+                'description', weight='B', config=settings.SEARCH_CONFIG
+            )
+        )
+
+    def search(self, value):
+        """
+        Полнотекстовый поиск по названию и описанию с ранжированием.
+        Без PostgreSQL выполняется поиск подстроки.
+        """
+        if not self.supports_full_text_search():
+            return self.filter(
+                Q(name__icontains=value) | Q(description__icontains=value)
+            )
+        query = SearchQuery(
+            value, config=settings.SEARCH_CONFIG, search_type='websearch'
+        )
+        return self.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', 'pk')
+
+
 class Title(models.Model):
     """Модель названий."""
     name = models.CharField(
@@ -78,25 +184,108 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Категория'
     )
+    reviews_count = models.PositiveIntegerField(
+        'Количество отзывов',
+        default=0,
+        editable=False,
+    )
+    score_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    rating = models.FloatField(
+        'Рейтинг',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        'Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+    score_1_count = score_counter(1)
+    score_2_count = score_counter(2)
+    score_3_count = score_counter(3)
+    score_4_count = score_counter(4)
+    score_5_count = score_counter(5)
+    score_6_count = score_counter(6)
+    score_7_count = score_counter(7)
+    score_8_count = score_counter(8)
+    score_9_count = score_counter(9)
+    score_10_count = score_counter(10)
+
+    objects = TitleQuerySet.as_manager()
+    stored_fields = {
+        'reviews_count', 'score_sum', 'rating', 'search_vector',
+        *(score_count_field(score) for score in SCORES),
+    }
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = (
+            models.Index(
+                fields=('category', 'year'),
+                name='title_category_year_idx'
+            ),
+            models.Index(fields=('year',), name='title_year_idx'),
+        )
 
     def __str__(self):
         return self.name
 
+    @property
+    def score_counts(self):
+        """Число отзывов с каждой оценкой: {оценка: количество}."""
+        return {
+            score: getattr(self, score_count_field(score)) for score in SCORES
+        }
+
+    def save(self, *args, **kwargs):
+        """
+        Изменение не перезаписывает счётчики отзывов и оценок, рейтинг
+        и поисковый вектор значениями, прочитанными до сохранения: их
+        обновляют отдельные UPDATE при изменении отзывов и текста.
+        """
+        if (not self._state.adding and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            skipped = self.get_deferred_fields() | self.stored_fields
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+                and field.name not in skipped
+            ]
+        super().save(*args, **kwargs)
+
 
 class TitleGenre(models.Model):
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
+        db_index=False,
     )
     genre = models.ForeignKey(
         Genre,
         on_delete=models.CASCADE,
+        db_index=False,
     )
 
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('title', 'genre',),
+                name='unique_title_genre'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('genre', 'title'),
+                name='titlegenre_genre_title_idx'
+            ),
+        )
+
     def __str__(self):
         return f'{self.title} {self.genre}'
 
@@ -107,6 +296,7 @@ class Review(models.Model):
         on_delete=models.CASCADE,
         related_name='review',
         verbose_name='Произведение',
+        db_index=False,
     )
     author = models.ForeignKey(
         User,
@@ -138,10 +328,53 @@ class Review(models.Model):
                 name='unique_title_author'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+            models.Index(
+                fields=('title', 'score'),
+                name='review_title_score_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:settings.MAX_SYMBOLS]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные значения для пересчёта рейтинга."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values)
+            if value is not models.DEFERRED
+        }
+        return instance
+
+    def lock_row(self, using=None):
+        """
+        Блокирует строку отзыва до конца транзакции и возвращает
+        сохранённые в ней title_id и score или None, если строки уже нет.
+        """
+        return Review.objects.using(using).select_for_update().filter(
+            pk=self.pk
+        ).values('title_id', 'score').first()
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет отзыв в транзакции. Изменение рейтинга считается
+        от заблокированной строки, а не от прочитанной раньше копии,
+        поэтому одновременные правки одного отзыва не расходятся.
+        """
+        using = kwargs.get('using') or router.db_for_write(
+            Review, instance=self
+        )
+        with transaction.atomic(using=using, savepoint=False):
+            if not self._state.adding:
+                self._loaded_values = self.lock_row(using) or {}
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     review = models.ForeignKey(
@@ -149,6 +382,7 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         related_name='comments',
         verbose_name='Обзор',
+        db_index=False,
     )
     author = models.ForeignKey(
         User,
@@ -167,6 +401,146 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:settings.MAX_SYMBOLS]
+
+
+class LeaderboardQuerySet(models.QuerySet):
+    """Запросы к материализованным рейтингам."""
+
+    def top(self, scope, board, limit):
+        """Первые limit мест рейтинга board ('rating' или 'reviews')."""
+        if board == 'reviews':
+            entries = self.filter(scope=scope, reviews_count__gt=0).order_by(
+                '-reviews_count', 'title_id'
+            )
+        else:
+            entries = self.filter(scope=scope, rating__isnull=False).order_by(
+                '-rating', 'title_id'
+            )
+        return entries[:limit]
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Место произведения в материализованных рейтингах: общем (пустой
+    scope), категории ('category:<id>') или жанра ('genre:<id>').
+    Копия рейтинга и числа отзывов позволяет читать первые места
+    по индексу, без агрегации отзывов.
+    """
+    scope = models.CharField(
+        'Рейтинг',
+        max_length=32,
+        blank=True,
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+        verbose_name='Произведение',
+    )
+    rating = models.FloatField(
+        'Рейтинг произведения',
+        null=True,
+    )
+    reviews_count = models.PositiveIntegerField(
+        'Количество отзывов',
+        default=0,
+    )
+
+    objects = LeaderboardQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтингах'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('scope', 'title'),
+                name='unique_leaderboard_scope_title'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('scope', '-rating', 'title'),
+                name='leaderboard_rating_idx'
+            ),
+            models.Index(
+                fields=('scope', '-reviews_count', 'title'),
+                name='leaderboard_reviews_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.scope or "all"}: {self.title_id}'
+
+
+class DeletionJob(models.Model):
+    """
+    Модель очереди удаления произведений, пользователей и отзывов
+    с большим числом зависимых отзывов и комментариев.
+    Задачи выполняет команда run_deletion_jobs (reviews.deletion).
+    """
+
+    class Targets(models.TextChoices):
+        TITLE = 'title', 'Произведение'
+        USER = 'user', 'Пользователь'
+        REVIEW = 'review', 'Отзыв'
+
+    class Statuses(models.TextChoices):
+        QUEUED = 'queued', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Выполнено'
+        FAILED = 'failed', 'Ошибка'
+
+    target = models.CharField(
+        'Что удаляется',
+        max_length=16,
+        choices=Targets.choices,
+    )
+    object_id = models.PositiveIntegerField('id объекта')
+    status = models.CharField(
+        'Состояние',
+        max_length=16,
+        choices=Statuses.choices,
+        default=Statuses.QUEUED,
+    )
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='deletion_jobs',
+        verbose_name='Кто запросил',
+    )
+    created = models.DateTimeField('Создано', default=timezone.now)
+    started_at = models.DateTimeField('Начато', null=True, blank=True)
+    leased_until = models.DateTimeField(
+        'Занято обработчиком до',
+        null=True,
+        blank=True,
+    )
+    finished_at = models.DateTimeField('Завершено', null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    deleted = models.PositiveIntegerField('Удалено строк', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        ordering = ('created', 'id')
+        indexes = (
+            models.Index(
+                fields=('status', 'created'),
+                name='deletionjob_queue_idx',
+            ),
+        )
+        verbose_name = 'Задача удаления'
+        verbose_name_plural = 'Задачи удаления'
+
+    def __str__(self):
+        return f'{self.target} {self.object_id}: {self.status}'
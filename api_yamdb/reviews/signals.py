@@ -0,0 +1,169 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from users.models import User
+
+from .cache import bump_version, bump_versions, categories, genres
+from .leaderboards import (category_scope, genre_scope, refresh_ratings,
+                           remove_scope, sync_title)
+from .models import Category, Comment, Genre, Review, Title
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    """Обновляет хранимый рейтинг произведения после сохранения отзыва."""
+    loaded = getattr(instance, '_loaded_values', {})
+    if created:
+        Title.objects.filter(pk=instance.title_id).apply_review_delta(
+            1, instance.score, {instance.score: 1}
+        )
+    elif 'title_id' not in loaded or 'score' not in loaded:
+        Title.objects.filter(
+            pk__in={loaded.get('title_id'), instance.title_id} - {None}
+        ).rebuild_ratings()
+    elif loaded['title_id'] != instance.title_id:
+        Title.objects.filter(pk=loaded['title_id']).apply_review_delta(
+            -1, -loaded['score'], {loaded['score']: -1}
+        )
+        Title.objects.filter(pk=instance.title_id).apply_review_delta(
+            1, instance.score, {instance.score: 1}
+        )
+    elif loaded['score'] != instance.score:
+        Title.objects.filter(pk=instance.title_id).apply_review_delta(
+            0, instance.score - loaded['score'],
+            {instance.score: 1, loaded['score']: -1},
+        )
+    title_ids = {loaded.get('title_id'), instance.title_id} - {None}
+    refresh_ratings(title_ids)
+    if loaded.get('title_id') not in (None, instance.title_id):
+        bump_versions([
+            f'reviews.review:{loaded["title_id"]}',
+            f'reviews.title:{loaded["title_id"]}',
+        ])
+    rating_changed = created or (
+        loaded.get('title_id'), loaded.get('score')
+    ) != (instance.title_id, instance.score)
+    instance._loaded_values = {
+        'title_id': instance.title_id,
+        'score': instance.score,
+    }
+    review_changed(instance.title_id, rating_changed)
+
+
+@receiver(pre_delete, sender=Review)
+def review_deleting(sender, instance, using, **kwargs):
+    """
+    Блокирует строку удаляемого отзыва (сигнал отправляется в транзакции
+    удаления): рейтинг уменьшается на сохранённую в ней оценку.
+    """
+    instance._loaded_values = instance.lock_row(using)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """
+    Обновляет хранимый рейтинг произведения после удаления отзыва.
+    Если отзыв уже удалён другим запросом, рейтинг не меняется.
+    """
+    loaded = instance._loaded_values
+    if loaded is None:
+        return
+    Title.objects.filter(pk=loaded['title_id']).apply_review_delta(
+        -1, -loaded['score'], {loaded['score']: -1}
+    )
+    refresh_ratings([loaded['title_id']])
+    review_changed(loaded['title_id'])
+
+
+def review_changed(title_id, rating_changed=True):
+    """
+    Меняет версию отзывов произведения, а если изменились оценки —
+    версию этого произведения и рейтингов в списках.
+    """
+    names = [f'reviews.review:{title_id}']
+    if rating_changed:
+        names += [f'reviews.title:{title_id}', 'reviews.rating']
+    bump_versions(names)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_changed(sender, **kwargs):
+    """Меняет версию произведений."""
+    bump_version('reviews.title')
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, update_fields=None, **kwargs):
+    """Обновляет поисковый вектор произведения."""
+    if update_fields is None or {'name', 'description'} & set(update_fields):
+        Title.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(post_save, sender=Title)
+def title_leaderboards(sender, instance, update_fields=None, **kwargs):
+    """Переносит произведение в рейтинги его категории."""
+    if update_fields is None or 'category' in update_fields:
+        sync_title(instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Переносит произведения в рейтинги их жанров."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        sync_title(instance.pk)
+    elif action == 'post_clear':
+        remove_scope(genre_scope(instance.pk))
+    else:
+        for title_id in pk_set:
+            sync_title(title_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    """Меняет версию комментариев к отзыву."""
+    bump_version(f'reviews.comment:{instance.review_id}')
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, **kwargs):
+    """
+    Меняет версию пользователей, когда меняется имя: оно входит
+    в отзывы и комментарии. У новых пользователей ещё нет отзывов,
+    а отзывы и комментарии удалённых удаляются со своими сигналами.
+    """
+    loaded = getattr(instance, '_loaded_values', {})
+    if not created and loaded.get('username') != instance.username:
+        bump_version('users.user')
+    instance._loaded_values = {**loaded, 'username': instance.username}
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    """Сбрасывает кэш категорий."""
+    categories.invalidate()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, **kwargs):
+    """Сбрасывает кэш жанров."""
+    genres.invalidate()
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    """Удаляет рейтинг удалённой категории."""
+    remove_scope(category_scope(instance.pk))
+
+
+@receiver(post_delete, sender=Genre)
+def genre_deleted(sender, instance, **kwargs):
+    """Удаляет рейтинг удалённого жанра."""
+    remove_scope(genre_scope(instance.pk))
@@ -1,6 +1,27 @@
 from django.contrib import admin
+from reviews.admin import QueuedDeletionAdminMixin
 
-from .models import User
+from .models import OutgoingEmail, User
 
-admin.site.unregister(User)
-admin.site.register(User)
+
+@admin.register(User)
+class UserAdmin(QueuedDeletionAdminMixin, admin.ModelAdmin):
+    """Регистрация модели User в панели суперпользователя"""
+    list_display = (
+        'id',
+        'username',
+        'email',
+        'role',
+        'bio',
+        'first_name',
+        'last_name',
+    )
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """Регистрация модели OutgoingEmail в панели суперпользователя"""
+    list_display = ('id', 'to', 'subject', 'created', 'attempts', 'sent_at',)
+    list_filter = ('sent_at',)
+    search_fields = ('to',)
+    readonly_fields = ('created',)
@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def enqueue_email(subject, body, to, from_email=None):
+    """Ставит письмо в очередь вместо отправки в рамках запроса."""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        to=to,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой: удваивается после каждой ошибки."""
+    return timedelta(
+        seconds=settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def claim_emails(batch_size):
+    """
+    Забирает пачку писем из очереди в короткой транзакции: строки
+    блокируются с пропуском уже заблокированных, попытка засчитывается,
+    а следующая откладывается на EMAIL_QUEUE_LEASE секунд. Другие
+    обработчики не возьмут эти письма, пока идёт отправка; если
+    обработчик упадёт, письма отправятся снова после аренды.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True).filter(
+                sent_at__isnull=True,
+                next_attempt_at__lte=now,
+                attempts__lt=settings.EMAIL_QUEUE_MAX_ATTEMPTS,
+            )[:batch_size]
+        )
+        for message in messages:
+            message.attempts += 1
+            message.next_attempt_at = now + timedelta(
+                seconds=settings.EMAIL_QUEUE_LEASE
+            )
+        OutgoingEmail.objects.bulk_update(
+            messages, ('attempts', 'next_attempt_at')
+        )
+    return messages
+
+
+def release_emails(messages):
+    """Возвращает письма в очередь без учёта попытки."""
+    OutgoingEmail.objects.filter(
+        pk__in=[message.pk for message in messages]
+    ).update(attempts=F('attempts') - 1, next_attempt_at=timezone.now())
+
+
+def send_queued_emails(batch_size=100):
+    """
+    Отправляет пачку писем из очереди через одно соединение с почтовым
+    сервером. Письма забираются claim_emails(), отправляются вне
+    транзакции, затем результаты записываются в базу.
+    Если почтовый сервер недоступен, письма возвращаются в очередь,
+    а ошибка пробрасывается.
+    Возвращает число отправленных и не отправленных писем.
+    """
+    messages = claim_emails(batch_size)
+    if not messages:
+        return 0, 0
+    sent = failed = 0
+    try:
+        connection = get_connection()
+        connection.open()
+    except Exception:
+        release_emails(messages)
+        raise
+    with connection:
+        for message in messages:
+            try:
+                EmailMessage(
+                    message.subject,
+                    message.body,
+                    message.from_email,
+                    [message.to],
+                    connection=connection,
+                ).send()
+            except Exception as error:
+                message.last_error = repr(error)
+                message.next_attempt_at = (
+                    timezone.now() + retry_delay(message.attempts)
+                )
+                failed += 1
+            else:
+                message.sent_at = timezone.now()
+                message.last_error = ''
+                sent += 1
+    OutgoingEmail.objects.bulk_update(
+        messages, ('sent_at', 'next_attempt_at', 'last_error')
+    )
+    return sent, failed
+
+
+def purge_sent_emails():
+    """
+    Удаляет отправленные письма и письма, исчерпавшие попытки, старше
+    EMAIL_QUEUE_KEEP_DAYS дней: в них хранятся коды подтверждения.
+    Возвращает число удалённых писем.
+    """
+    if not settings.EMAIL_QUEUE_KEEP_DAYS:
+        return 0
+    cutoff = timezone.now() - timedelta(days=settings.EMAIL_QUEUE_KEEP_DAYS)
+    deleted, _ = OutgoingEmail.objects.filter(
+        Q(sent_at__lt=cutoff)
+        | Q(
+            sent_at__isnull=True,
+            attempts__gte=settings.EMAIL_QUEUE_MAX_ATTEMPTS,
+            created__lt=cutoff,
+        )
+    ).delete()
+    return deleted
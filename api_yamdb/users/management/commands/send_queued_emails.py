@@ -0,0 +1,61 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+from users.mail import purge_sent_emails, send_queued_emails
+
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    """
+    Отправка писем из очереди пачками через одно соединение.
+    Раз в час удаляются старые отправленные письма.
+    """
+    help = "Sends queued emails in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Messages sent over one mail server connection',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the queue instead of exiting when it is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1,
+            help='Seconds to wait when the queue is empty (with --loop)',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        errors = 0
+        purge_at = 0
+        while True:
+            if time.monotonic() >= purge_at:
+                purged = purge_sent_emails()
+                if purged:
+                    self.stdout.write(f'Purged: {purged}')
+                purge_at = time.monotonic() + PURGE_INTERVAL
+            try:
+                sent, failed = send_queued_emails(options['batch_size'])
+            except Exception as error:
+                if not options['loop']:
+                    raise
+                errors += 1
+                self.stderr.write(f'Mail server unavailable: {error!r}')
+                time.sleep(options['interval'] * 2 ** min(errors, 6))
+                continue
+            errors = 0
+            if sent or failed:
+                self.stdout.write(f'Sent: {sent}, failed: {failed}')
+            elif not options['loop']:
+                break
+            else:
+                time.sleep(options['interval'])
@@ -0,0 +1,39 @@
+# Запуск под ASGI:
+# gunicorn api_yamdb.asgi:application -c /app/infra/gunicorn.conf.py
+import multiprocessing
+import os
+import shutil
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(
+    os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+)
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = timeout
+keepalive = 5
+
+# Метрики воркеров складываются через файлы prometheus_client
+# в общем каталоге (см. api.metrics.MetricsRegistry).
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/yamdb-metrics')
+
+
+def on_starting(server):
+    """Очищает каталог метрик от файлов прошлого запуска."""
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    """Убирает живые метрики завершившегося воркера."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    """Закрывает соединения и пулы соединений завершающегося воркера."""
+    from api_yamdb.db import close_all
+
+    close_all()
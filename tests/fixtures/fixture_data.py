@@ -0,0 +1,153 @@
+import pytest
+
+
+@pytest.fixture
+def category():
+    from reviews.models import Category
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def genres():
+    from reviews.models import Genre
+    return [
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+
+
+@pytest.fixture
+def make_titles(category, genres):
+    from reviews.models import Title
+
+    def make_titles(count):
+        titles = []
+        for number in range(count):
+            title = Title.objects.create(
+                name=f'Произведение {number}',
+                year=2000,
+                category=category,
+            )
+            title.genre.set(genres)
+            titles.append(title)
+        return titles
+    return make_titles
+
+
+@pytest.fixture
+def make_reviews(django_user_model):
+    from reviews.models import Review
+
+    def make_reviews(title, count):
+        reviews = []
+        for number in range(count):
+            author = django_user_model.objects.create(
+                username=f'author_{title.id}_{number}',
+                email=f'author_{title.id}_{number}@yamdb.fake',
+            )
+            reviews.append(Review.objects.create(
+                title=title, author=author, text='Отзыв', score=number % 10 + 1
+            ))
+        return reviews
+    return make_reviews
+
+
+@pytest.fixture
+def make_review(django_user_model):
+    from reviews.models import Review
+
+    def make_review(title, score, number=0):
+        author = django_user_model.objects.create(
+            username=f'reviewer_{title.id}_{number}',
+            email=f'reviewer_{title.id}_{number}@yamdb.fake',
+        )
+        return Review.objects.create(
+            title=title, author=author, text='Отзыв', score=score
+        )
+    return make_review
+
+
+@pytest.fixture
+def make_comments(django_user_model):
+    from reviews.models import Comment
+
+    def make_comments(review, count):
+        return [
+            Comment.objects.create(
+                review=review, author=review.author, text=f'Комментарий {number}'
+            )
+            for number in range(count)
+        ]
+    return make_comments
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+    cache.clear()
+
+
+@pytest.fixture
+def warm_dictionaries():
+    """Справочники уже в кэше, как в работающем приложении."""
+    from reviews.cache import categories, genres
+
+    def warm_dictionaries():
+        categories.all()
+        genres.all()
+    return warm_dictionaries
+
+
+DATA_FILES = {
+    'category.csv': (
+        ('id', 'name', 'slug'),
+        (10, 'Фильм', 'movie'),
+        (11, 'Книга', 'book'),
+        (12, 'Музыка', 'music'),
+    ),
+    'genre.csv': (
+        ('id', 'name', 'slug'),
+        (20, 'Драма', 'drama'),
+        (21, 'Комедия', 'comedy'),
+    ),
+    'titles.csv': (
+        ('id', 'name', 'year', 'category'),
+        (30, 'Первое', 1994, 10),
+        (31, 'Второе', 1972, 11),
+    ),
+    'genre_title.csv': (
+        ('id', 'title_id', 'genre_id'),
+        (40, 30, 20),
+        (41, 30, 21),
+        (42, 31, 20),
+    ),
+    'users.csv': (
+        ('id', 'username', 'email', 'role', 'bio', 'first_name',
+         'last_name'),
+        (50, 'reader', 'reader@yamdb.fake', 'user', '', '', ''),
+        (51, 'critic', 'critic@yamdb.fake', 'moderator', 'Пишет', '', ''),
+    ),
+    'review.csv': (
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        (60, 30, 'Отзыв, с запятой\nи переносом', 50, 8,
+         '2020-01-01T10:00:00.000Z'),
+        (61, 30, 'Второй', 51, 6, '2021-06-01T10:00:00.000Z'),
+    ),
+    'comments.csv': (
+        ('id', 'review_id', 'text', 'author', 'pub_date'),
+        (70, 60, 'Комментарий', 51, '2020-01-02T10:00:00.000Z'),
+        (71, 61, 'Ещё', 50, '2021-06-02T10:00:00.000Z'),
+    ),
+}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Каталог с небольшим набором CSV файлов в формате static/data."""
+    import csv
+
+    for filename, rows in DATA_FILES.items():
+        with open(tmp_path / filename, 'w', encoding='utf8',
+                  newline='') as csv_file:
+            csv.writer(csv_file, lineterminator='\n').writerows(rows)
+    return tmp_path
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from api.views import ReviewViewSet, TitleViewSet
+from asgiref.sync import async_to_sync
+from rest_framework.test import APIRequestFactory
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncViews:
+    """Под ASGI чтение выполняется асинхронным представлением."""
+
+    def test_sync_by_default(self):
+        view = TitleViewSet.as_view({'get': 'list'})
+        assert not asyncio.iscoroutinefunction(view)
+
+    def test_async_list_matches_sync(self, settings, make_titles):
+        make_titles(3)
+        sync_view = TitleViewSet.as_view({'get': 'list'})
+        settings.ASYNC_VIEWS = True
+        async_view = TitleViewSet.as_view({'get': 'list'})
+        assert asyncio.iscoroutinefunction(async_view)
+        assert async_view.cls is TitleViewSet
+        factory = APIRequestFactory()
+        expected = sync_view(factory.get('/api/v1/titles/')).render()
+        response = async_to_sync(async_view)(factory.get('/api/v1/titles/'))
+        assert response.status_code == 200
+        assert response.content == expected.content
+
+    def test_async_write_requires_auth(self, settings, make_titles):
+        title, = make_titles(1)
+        settings.ASYNC_VIEWS = True
+        view = ReviewViewSet.as_view({'post': 'create'})
+        request = APIRequestFactory().post(
+            f'/api/v1/titles/{title.id}/reviews/', {'text': 'a', 'score': 5}
+        )
+        response = async_to_sync(view)(request, title_id=title.id)
+        assert response.status_code == 401
+
+    def test_read_threads_bounded(self, settings, make_titles):
+        from api.mixins import read_executor
+
+        make_titles(1)
+        settings.ASYNC_VIEWS = True
+        settings.ASYNC_READ_THREADS = 2
+        read_executor.cache_clear()
+        view = TitleViewSet.as_view({'get': 'list'})
+        factory = APIRequestFactory()
+
+        async def read_many():
+            return await asyncio.gather(*(
+                view(factory.get('/api/v1/titles/')) for _ in range(8)
+            ))
+
+        try:
+            responses = async_to_sync(read_many)()
+            assert {response.status_code for response in responses} == {200}
+            assert len(read_executor()._threads) == 2
+        finally:
+            read_executor().shutdown()
+            read_executor.cache_clear()
@@ -0,0 +1,101 @@
+import pytest
+from api.authentication import access_token_for
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import Roles
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create(
+        username='token_admin', email='token_admin@yamdb.ru', role=Roles.ADMIN
+    )
+
+
+def client_for(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.mark.django_db
+class TestStatelessAuthentication:
+    """Права проверяются по утверждениям токена без запроса к базе."""
+
+    def test_no_user_query(self, admin, make_titles, warm_dictionaries,
+                           django_assert_num_queries):
+        make_titles(2)
+        warm_dictionaries()
+        client = client_for(access_token_for(admin))
+        client.get('/api/v1/users/me/')
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+
+    def test_admin_claims(self, admin):
+        client = client_for(access_token_for(admin))
+        response = client.post(
+            '/api/v1/categories/', {'name': 'Кино', 'slug': 'movie'}
+        )
+        assert response.status_code == 201
+
+    def test_role_change_applies_to_issued_tokens(
+            self, admin, django_capture_on_commit_callbacks):
+        client = client_for(access_token_for(admin))
+        assert client.get('/api/v1/users/').status_code == 200
+        with django_capture_on_commit_callbacks(execute=True):
+            admin.role = Roles.USER
+            admin.save()
+        response = client.post(
+            '/api/v1/categories/', {'name': 'Кино', 'slug': 'movie'}
+        )
+        assert response.status_code == 403
+
+    def test_demoted_user_refused_without_cached_state(self, admin):
+        from django.core.cache import cache
+
+        client = client_for(access_token_for(admin))
+        assert client.get('/api/v1/users/').status_code == 200
+        type(admin).objects.filter(pk=admin.pk).update(role=Roles.USER)
+        cache.clear()
+        assert client.get('/api/v1/users/').status_code == 403
+
+    def test_deleted_user_rejected(self, admin,
+                                   django_capture_on_commit_callbacks):
+        client = client_for(access_token_for(admin))
+        assert client.get('/api/v1/users/me/').status_code == 200
+        with django_capture_on_commit_callbacks(execute=True):
+            admin.delete()
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    def test_state_not_published_before_commit(
+            self, admin, django_capture_on_commit_callbacks):
+        client = client_for(access_token_for(admin))
+        assert client.get('/api/v1/users/').status_code == 200
+        with django_capture_on_commit_callbacks() as callbacks:
+            admin.role = Roles.USER
+            admin.save()
+            assert client.get('/api/v1/users/').status_code == 200
+        assert callbacks
+
+    def test_me_loads_user(self, admin):
+        response = client_for(access_token_for(admin)).get('/api/v1/users/me/')
+        assert response.json()['email'] == 'token_admin@yamdb.ru'
+
+    def test_token_without_claims(self, admin):
+        client = client_for(AccessToken.for_user(admin))
+        response = client.post(
+            '/api/v1/categories/', {'name': 'Кино', 'slug': 'movie'}
+        )
+        assert response.status_code == 201
+
+    def test_author_can_edit_review(self, make_titles, make_reviews):
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        client = client_for(access_token_for(review.author))
+        response = client.patch(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/',
+            {'text': 'Новый текст'},
+        )
+        assert response.status_code == 200
+        assert response.json()['author'] == review.author.username
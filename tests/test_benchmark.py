@@ -0,0 +1,27 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def queries_per_request(cold):
+    stdout = StringIO()
+    call_command(
+        'benchmark_api', requests=3, only=['categories list'], cold=cold,
+        stdout=stdout,
+    )
+    *_, row = stdout.getvalue().splitlines()
+    assert row.startswith('categories list')
+    return float(row.split()[-1])
+
+
+@pytest.mark.django_db
+def test_cold_keeps_unrelated_cache(make_titles, make_reviews):
+    from django.core.cache import cache
+
+    title, = make_titles(1)
+    make_reviews(title, 1)
+    cache.set('throttle:unrelated', 5)
+    assert queries_per_request(cold=False) < 1
+    assert queries_per_request(cold=True) >= 1
+    assert cache.get('throttle:unrelated') == 5
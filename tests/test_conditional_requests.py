@@ -0,0 +1,135 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from rest_framework.test import APIClient
+
+
+def age_versions(seconds):
+    """Сдвигает версии произведений на seconds секунд в прошлое."""
+    from api.views import TitleViewSet
+    from django.core.cache import cache
+
+    cache.set_many({
+        f'version:{name}': time.time_ns() - seconds * 10 ** 9
+        for name in TitleViewSet.version_names
+    }, timeout=None)
+
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+
+    def test_titles_not_modified(self, make_titles,
+                                 django_assert_num_queries):
+        make_titles(2)
+        age_versions(2)
+        response = APIClient().get('/api/v1/titles/')
+        assert 'Last-Modified' in response
+        with django_assert_num_queries(0):
+            response = APIClient().get(
+                '/api/v1/titles/', HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        assert response.status_code == 304
+
+    def test_reviews_etag_changes_on_write(self, make_titles, make_reviews):
+        first, second = make_titles(2)
+        url = f'/api/v1/titles/{first.id}/reviews/'
+        etag = APIClient().get(url)['ETag']
+        make_reviews(second, 1)
+        assert APIClient().get(url)['ETag'] == etag
+        make_reviews(first, 1)
+        response = APIClient().get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_anonymous_response_cached(self, make_titles, make_reviews,
+                                       django_assert_num_queries):
+        title, = make_titles(1)
+        APIClient().get('/api/v1/titles/?year=2000&genre=drama')
+        with django_assert_num_queries(0):
+            response = APIClient().get('/api/v1/titles/?genre=drama&year=2000')
+        assert response.json()['results'][0]['rating'] is None
+        make_reviews(title, 1)
+        response = APIClient().get('/api/v1/titles/?genre=drama&year=2000')
+        assert response.json()['results'][0]['rating'] == 1
+
+    def test_cached_per_host_and_scheme(self, make_titles):
+        make_titles(11)
+        links = {}
+        for host, secure in (('localhost', False), ('web', False),
+                             ('localhost', True)):
+            response = APIClient().get(
+                '/api/v1/titles/', HTTP_HOST=host, secure=secure
+            )
+            links[response['ETag']] = response.json()['next']
+        assert sorted(links.values()) == [
+            'http://localhost/api/v1/titles/?page=2',
+            'http://web/api/v1/titles/?page=2',
+            'https://localhost/api/v1/titles/?page=2',
+        ]
+
+    def test_no_last_modified_within_second(self, make_titles,
+                                            monkeypatch):
+        from api.views import TitleViewSet
+        from reviews.cache import get_versions
+
+        title, = make_titles(1)
+        age_versions(2)
+        response = APIClient().get('/api/v1/titles/')
+        last_modified = response['Last-Modified']
+        assert APIClient().get(
+            '/api/v1/titles/', HTTP_IF_MODIFIED_SINCE=last_modified
+        ).status_code == 304
+        title.name = 'Новое название'
+        title.save()
+        changed = max(get_versions(TitleViewSet.version_names))
+        monkeypatch.setattr(
+            'api.mixins.time', SimpleNamespace(time_ns=lambda: changed)
+        )
+        response = APIClient().get(
+            '/api/v1/titles/', HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        assert response.status_code == 200
+        assert 'Last-Modified' not in response
+        assert response.json()['results'][0]['name'] == 'Новое название'
+
+    def test_review_write_keeps_other_titles(self, make_titles,
+                                             make_reviews):
+        first, second = make_titles(2)
+        urls = (
+            '/api/v1/titles/', f'/api/v1/titles/{first.id}/',
+            f'/api/v1/titles/{second.id}/',
+            f'/api/v1/titles/{first.id}/reviews/',
+        )
+        etags = [APIClient().get(url)['ETag'] for url in urls]
+        review, = make_reviews(first, 1)
+        changed = [APIClient().get(url)['ETag'] for url in urls]
+        assert [old != new for old, new in zip(etags, changed)] == [
+            True, True, False, True
+        ]
+        review.text = 'Исправленный отзыв'
+        review.save()
+        etags = [APIClient().get(url)['ETag'] for url in urls]
+        assert [old != new for old, new in zip(changed, etags)] == [
+            False, False, False, True
+        ]
+
+    def test_user_save_keeps_reviews(self, make_titles, make_reviews,
+                                     django_user_model):
+        from django.utils import timezone
+
+        title, = make_titles(1)
+        make_reviews(title, 1)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = APIClient().get(url)['ETag']
+        author = django_user_model.objects.get()
+        author.last_login = timezone.now()
+        author.save(update_fields=('last_login',))
+        author.bio = 'Биография'
+        author.save()
+        assert APIClient().get(url)['ETag'] == etag
+        author.username = 'renamed'
+        author.save()
+        response = APIClient().get(url)
+        assert response['ETag'] != etag
+        assert response.json()['results'][0]['author'] == 'renamed'
@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+
+import pytest
+from api_yamdb.db import pool as pools
+from api_yamdb.db.pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.usable = True
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def connect():
+        created.append(FakeConnection())
+        return created[-1]
+
+    options = {
+        'check': lambda connection: connection.usable,
+        'max_size': 2,
+        'timeout': 0.05,
+        **kwargs,
+    }
+    return ConnectionPool(connect, **options), created
+
+
+def reset(connection):
+    return not connection.closed
+
+
+class TestConnectionPool:
+    """Пул переиспользует соединения и ограничивает их число."""
+
+    def test_reuses_released_connection(self):
+        pool, created = make_pool()
+        connection = pool.acquire()
+        pool.release(connection, reset)
+        assert pool.acquire() is connection
+        assert len(created) == 1
+
+    def test_timeout_when_exhausted(self):
+        pool, _ = make_pool()
+        pool.acquire()
+        pool.acquire()
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire()
+        assert pool.stats()['timeouts'] == 1
+        assert pool.stats()['in_use'] == 2
+
+    def test_waiter_gets_released_connection(self):
+        pool, _ = make_pool(timeout=5)
+        first = pool.acquire()
+        pool.acquire()
+        timer = threading.Timer(0.05, pool.release, (first, reset))
+        timer.start()
+        assert pool.acquire() is first
+        timer.join()
+        assert pool.stats()['wait_time'] > 0
+
+    def test_broken_connection_discarded(self):
+        pool, created = make_pool()
+        connection = pool.acquire()
+        connection.close()
+        pool.release(connection, reset)
+        assert pool.stats()['size'] == 0
+        assert pool.acquire() is not connection
+        assert len(created) == 2
+
+    def test_health_check_after_idle(self):
+        pool, created = make_pool(health_check_interval=0.01)
+        connection = pool.acquire()
+        pool.release(connection, reset)
+        connection.usable = False
+        time.sleep(0.02)
+        assert pool.acquire() is created[1]
+        assert connection.closed
+
+    def test_close(self):
+        pool, created = make_pool()
+        idle, busy = pool.acquire(), pool.acquire()
+        pool.release(idle, reset)
+        pool.close()
+        assert idle.closed and not busy.closed
+        pool.release(busy, reset)
+        assert busy.closed
+        assert pool.stats()['size'] == 0
+
+
+def test_pools_forgotten_after_fork():
+    pool = pools.get_pool('forked', {}, lambda: make_pool()[0])
+    connection = pool.acquire()
+    pool.release(connection, reset)
+    pid = os.fork()
+    if not pid:
+        os._exit(0 if not pools.pools else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert not connection.closed
+    pools.close_pools('forked')
+    assert connection.closed
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPooledBackend:
+    """Пулы настоящего бэкенда закрываются вместе с сессиями в PostgreSQL."""
+
+    @pytest.fixture(autouse=True)
+    def postgresql_only(self):
+        from django.db import connection
+
+        if connection.vendor != 'postgresql':
+            pytest.skip('Пул есть только у бэкенда PostgreSQL')
+        yield
+        pools.close_pools('pooled')
+
+    def pooled(self, **settings_dict):
+        from django.db import connection
+
+        from api_yamdb.db.postgresql.base import DatabaseWrapper
+
+        return DatabaseWrapper(
+            {**connection.settings_dict, 'POOL_MAX_SIZE': 2, **settings_dict},
+            alias='pooled',
+        )
+
+    def session_alive(self, pid):
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT count(*) FROM pg_stat_activity WHERE pid = %s', [pid]
+            )
+            return cursor.fetchone()[0] == 1
+
+    def session_of(self, wrapper):
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            return cursor.fetchone()[0]
+
+    def test_close_all(self):
+        from api_yamdb.db import close_all
+
+        wrapper = self.pooled()
+        pid = self.session_of(wrapper)
+        wrapper.close()
+        assert self.session_alive(pid)
+        close_all()
+        deadline = time.monotonic() + 5
+        while self.session_alive(pid) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert not self.session_alive(pid)
+
+    def test_destroy_test_db(self):
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            cursor.execute('DROP DATABASE IF EXISTS yamdb_pool_teardown')
+            cursor.execute('CREATE DATABASE yamdb_pool_teardown')
+        wrapper = self.pooled(NAME='yamdb_pool_teardown')
+        pid = self.session_of(wrapper)
+        wrapper.close()
+        assert self.session_alive(pid)
+        wrapper.creation._destroy_test_db('yamdb_pool_teardown', 0)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT count(*) FROM pg_database WHERE datname = %s',
+                ['yamdb_pool_teardown'],
+            )
+            assert cursor.fetchone()[0] == 0
@@ -0,0 +1,260 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def admin_client(django_user_model):
+    admin = django_user_model.objects.create(
+        username='deleter', email='deleter@yamdb.fake', role='admin'
+    )
+    client = APIClient()
+    client.force_authenticate(admin)
+    return client
+
+
+@pytest.fixture
+def sync_limit(settings):
+    settings.DELETION_SYNC_LIMIT = 2
+
+
+def stored(title):
+    title.refresh_from_db()
+    return title.reviews_count, title.score_sum, title.rating, {
+        score: count for score, count in title.score_counts.items() if count
+    }
+
+
+@pytest.mark.django_db
+class TestQueuedDeletion:
+    """Большие каскады удаляются пачками в фоне, счётчики не расходятся."""
+
+    def test_small_cascade_deleted_at_once(self, sync_limit, admin_client,
+                                           make_titles, make_reviews):
+        from reviews.models import DeletionJob, Title
+
+        title, = make_titles(1)
+        make_reviews(title, 1)
+        response = admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 204
+        assert not Title.objects.filter(pk=title.pk).exists()
+        assert not DeletionJob.objects.exists()
+
+    def test_title(self, sync_limit, admin_client, make_titles, make_reviews,
+                   make_comments):
+        from reviews.models import Comment, LeaderboardEntry, Review, Title
+
+        title, other = make_titles(2)
+        review, *_ = make_reviews(title, 3)
+        make_comments(review, 2)
+        make_reviews(other, 1)
+        response = admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 202
+        job = response.json()
+        assert (job['target'], job['object_id'], job['status']) == (
+            'title', title.id, 'queued'
+        )
+        assert response['Location'].endswith(
+            f'/api/v1/deletions/{job["id"]}/'
+        )
+        again = admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert again.json()['id'] == job['id']
+        call_command('run_deletion_jobs', batch_size=2)
+        status = admin_client.get(f'/api/v1/deletions/{job["id"]}/').json()
+        assert status['status'] == 'done'
+        assert status['deleted'] == 2 + 3 + 7
+        assert not Title.objects.filter(pk=title.pk).exists()
+        assert not Review.objects.filter(title_id=title.pk).exists()
+        assert not Comment.objects.filter(review__title_id=title.pk).exists()
+        assert not LeaderboardEntry.objects.filter(title_id=title.pk).exists()
+        assert stored(other) == (1, 1, 1, {1: 1})
+
+    def test_user_keeps_aggregates(self, sync_limit, admin_client,
+                                   make_titles, make_comments,
+                                   django_user_model):
+        from reviews.models import LeaderboardEntry, Review
+
+        titles = make_titles(3)
+        user, other = (
+            django_user_model.objects.create(
+                username=name, email=f'{name}@yamdb.fake'
+            )
+            for name in ('prolific', 'modest')
+        )
+        for number, title in enumerate(titles):
+            review = Review.objects.create(
+                title=title, author=user, text='Отзыв', score=number + 2
+            )
+            make_comments(review, 1)
+        Review.objects.create(
+            title=titles[0], author=other, text='Отзыв', score=8
+        )
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 202
+        call_command('run_deletion_jobs', batch_size=2)
+        assert not django_user_model.objects.filter(pk=user.pk).exists()
+        assert stored(titles[0]) == (1, 8, 8, {8: 1})
+        assert stored(titles[1]) == (0, 0, None, {})
+        assert set(LeaderboardEntry.objects.filter(scope='').values_list(
+            'title_id', 'rating', 'reviews_count'
+        )) == {
+            (titles[0].id, 8, 1), (titles[1].id, None, 0),
+            (titles[2].id, None, 0),
+        }
+        response = APIClient().get(f'/api/v1/titles/{titles[0].id}/')
+        assert response.json()['rating'] == 8
+
+    def test_review_and_status_access(self, sync_limit, make_titles,
+                                      make_reviews, make_comments,
+                                      django_user_model):
+        from reviews.models import Comment, Review
+
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        make_comments(review, 3)
+        client = APIClient()
+        client.force_authenticate(review.author)
+        response = client.delete(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        )
+        assert response.status_code == 202
+        job_url = f'/api/v1/deletions/{response.json()["id"]}/'
+        assert client.get(job_url).json()['status'] == 'queued'
+        stranger = django_user_model.objects.create(
+            username='stranger', email='stranger@yamdb.fake'
+        )
+        client.force_authenticate(stranger)
+        assert client.get(job_url).status_code == 404
+        assert APIClient().get(job_url).status_code == 401
+        call_command('run_deletion_jobs')
+        assert not Review.objects.filter(pk=review.pk).exists()
+        assert not Comment.objects.exists()
+        assert stored(title) == (0, 0, None, {})
+
+    def test_jwt_client(self, sync_limit, make_titles, make_reviews,
+                        make_comments):
+        from api.authentication import access_token_for
+        from reviews.models import DeletionJob
+
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        make_comments(review, 3)
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {access_token_for(review.author)}'
+        )
+        response = client.delete(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        )
+        assert response.status_code == 202
+        job = DeletionJob.objects.get()
+        assert job.requested_by_id == review.author.id
+        response = client.get(response['Location'])
+        assert response.status_code == 200
+        assert response.json()['id'] == job.id
+
+    def test_failed_job(self, sync_limit, make_titles, make_reviews,
+                        monkeypatch):
+        from reviews import deletion
+        from reviews.models import DeletionJob, Title
+
+        title, = make_titles(1)
+        make_reviews(title, 3)
+        job = deletion.enqueue_large_deletion(title)
+        monkeypatch.setattr(
+            deletion, 'delete_reviews',
+            lambda *args: 1 / 0,
+        )
+        assert deletion.run_next_deletion_job().status == 'failed'
+        job.refresh_from_db()
+        assert 'ZeroDivisionError' in job.last_error
+        monkeypatch.undo()
+        DeletionJob.objects.filter(pk=job.pk).update(status='queued')
+        assert deletion.run_next_deletion_job().status == 'done'
+        assert not Title.objects.filter(pk=title.pk).exists()
+        assert deletion.run_next_deletion_job() is None
+
+    def test_admin(self, sync_limit, make_titles, make_reviews, client,
+                   django_user_model):
+        from reviews.models import DeletionJob, Title
+
+        title, = make_titles(1)
+        make_reviews(title, 3)
+        client.force_login(django_user_model.objects.create_superuser(
+            'root', 'root@yamdb.fake', 'password'
+        ))
+        url = f'/admin/reviews/title/{title.id}/delete/'
+        response = client.get(url)
+        assert response.status_code == 200
+        response = client.post(url, {'post': 'yes'})
+        assert response.status_code == 302
+        assert Title.objects.filter(pk=title.pk).exists()
+        job, = DeletionJob.objects.all()
+        assert (job.target, job.object_id) == ('title', title.id)
+        call_command('run_deletion_jobs')
+        assert not Title.objects.filter(pk=title.pk).exists()
+
+    def test_stuck_job_reclaimed(self, sync_limit, make_titles, make_reviews,
+                                 settings):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.utils import timezone
+        from reviews import deletion
+        from reviews.models import DeletionJob, Title
+
+        title, = make_titles(1)
+        make_reviews(title, 3)
+        job = deletion.enqueue_large_deletion(title)
+        assert deletion.claim_job() == job
+        assert deletion.run_next_deletion_job() is None
+        DeletionJob.objects.filter(pk=job.pk).update(
+            leased_until=timezone.now() - timedelta(seconds=1)
+        )
+        with CaptureQueriesContext(connection) as context:
+            job = deletion.run_next_deletion_job(batch_size=2)
+        assert (job.status, job.attempts, job.leased_until) == (
+            'done', 2, None
+        )
+        assert not Title.objects.filter(pk=title.pk).exists()
+        if connection.features.has_select_for_update:
+            assert any(
+                'review' in query['sql'] and 'FOR UPDATE' in query['sql']
+                for query in context.captured_queries
+            )
+
+    def test_admin_requeue(self, sync_limit, make_titles, make_reviews,
+                           client, django_user_model):
+        from django.utils import timezone
+        from reviews import deletion
+        from reviews.models import DeletionJob
+
+        titles = make_titles(2)
+        for title in titles:
+            make_reviews(title, 3)
+        live, stuck = map(deletion.enqueue_large_deletion, titles)
+        deletion.claim_job()
+        deletion.claim_job()
+        DeletionJob.objects.filter(pk=stuck.pk).update(
+            leased_until=timezone.now() - timedelta(seconds=1)
+        )
+        client.force_login(django_user_model.objects.create_superuser(
+            'root', 'root@yamdb.fake', 'password'
+        ))
+        response = client.post('/admin/reviews/deletionjob/', {
+            'action': 'requeue', '_selected_action': [live.pk, stuck.pk],
+        })
+        assert response.status_code == 302
+        assert dict(DeletionJob.objects.values_list('pk', 'status')) == {
+            live.pk: 'running', stuck.pk: 'queued',
+        }
+
+    def test_user_admin(self):
+        from django.contrib import admin
+        from reviews.admin import QueuedDeletionAdminMixin
+        from users.models import User
+
+        user_admin = admin.site._registry[User]
+        assert isinstance(user_admin, QueuedDeletionAdminMixin)
+        assert 'role' in user_admin.list_display
@@ -0,0 +1,83 @@
+import gzip
+import json
+
+import pytest
+from django.core.management import call_command
+
+from .fixtures.fixture_data import DATA_FILES
+
+
+def dump(directory, **options):
+    call_command('dump_data_files', dir=str(directory), stdout=None,
+                 **options)
+
+
+def read(path):
+    with open(path, encoding='utf8', newline='') as dumped:
+        return dumped.read()
+
+
+@pytest.mark.django_db
+class TestDumpDataFiles:
+    """Выгрузка в формате static/data загружается обратно без потерь."""
+
+    @pytest.fixture(autouse=True)
+    def loaded(self, data_dir):
+        call_command('load_data_files', dir=str(data_dir), stdout=None)
+
+    def test_round_trip(self, data_dir, tmp_path):
+        from reviews.models import Comment, Review, Title
+
+        dump(tmp_path / 'dump')
+        for filename in DATA_FILES:
+            assert read(tmp_path / 'dump' / filename) == read(
+                data_dir / filename
+            )
+        expected = set(Review.objects.values_list(
+            'pk', 'title_id', 'author_id', 'score', 'text', 'pub_date'
+        ))
+        Comment.objects.all().delete()
+        Review.objects.all().delete()
+        call_command('load_data_files', dir=str(tmp_path / 'dump'),
+                     only=['review', 'comments'], stdout=None)
+        assert set(Review.objects.values_list(
+            'pk', 'title_id', 'author_id', 'score', 'text', 'pub_date'
+        )) == expected
+        assert Comment.objects.count() == 2
+        assert Title.objects.get(pk=30).rating == 7
+
+    def test_gzip(self, data_dir, tmp_path):
+        dump(tmp_path, only=['review'], gzip=True)
+        with gzip.open(tmp_path / 'review.csv.gz', 'rt', encoding='utf8',
+                       newline='') as dumped:
+            assert dumped.read() == read(data_dir / 'review.csv')
+
+    def test_jsonl(self, tmp_path):
+        dump(tmp_path, only=['category', 'review'], format='jsonl')
+        with open(tmp_path / 'category.jsonl', encoding='utf8') as dumped:
+            assert [json.loads(line) for line in dumped] == [
+                {'id': 10, 'name': 'Фильм', 'slug': 'movie'},
+                {'id': 11, 'name': 'Книга', 'slug': 'book'},
+                {'id': 12, 'name': 'Музыка', 'slug': 'music'},
+            ]
+        with open(tmp_path / 'review.jsonl', encoding='utf8') as dumped:
+            first = json.loads(next(dumped))
+        assert first == {
+            'id': 60, 'title_id': 30, 'text': 'Отзыв, с запятой\nи переносом',
+            'author': 50, 'score': 8, 'pub_date': '2020-01-01T10:00:00.000Z',
+        }
+
+    def test_since(self, tmp_path):
+        dump(tmp_path, since='2021-01-01')
+        ids = {
+            filename: [
+                line.split(',')[0]
+                for line in read(tmp_path / filename).splitlines()[1:]
+            ]
+            for filename in ('category.csv', 'review.csv', 'comments.csv')
+        }
+        assert ids == {
+            'category.csv': ['10', '11', '12'],
+            'review.csv': ['61'],
+            'comments.csv': ['71'],
+        }
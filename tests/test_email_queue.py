@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+from users.models import OutgoingEmail
+
+LOCMEM_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+@pytest.fixture
+def outbox(settings, mailoutbox):
+    settings.EMAIL_BACKEND = LOCMEM_BACKEND
+    return mailoutbox
+
+
+def signup(username):
+    return APIClient().post('/api/v1/auth/signup/', {
+        'username': username, 'email': f'{username}@yamdb.ru'
+    })
+
+
+@pytest.mark.django_db
+class TestEmailQueue:
+    """Письма с кодом подтверждения отправляются из очереди."""
+
+    def test_signup_only_enqueues(self, outbox):
+        response = signup('queued')
+        assert response.status_code == 200
+        assert not outbox
+        message = OutgoingEmail.objects.get()
+        assert message.to == 'queued@yamdb.ru'
+        assert message.sent_at is None
+
+    def test_worker_sends_batch(self, outbox):
+        for number in range(3):
+            signup(f'user_{number}')
+        call_command('send_queued_emails', batch_size=2)
+        assert not OutgoingEmail.objects.filter(sent_at=None).exists()
+        assert sorted(to for message in outbox for to in message.to) == [
+            f'user_{number}@yamdb.ru' for number in range(3)
+        ]
+        assert all('Ваш код подтверждения' in message.body
+                   for message in outbox)
+        assert len({id(message.connection) for message in outbox}) == 2, (
+            'Пачка отправляется через одно соединение'
+        )
+
+    def test_claimed_while_sending(self, outbox, monkeypatch):
+        from django.core.mail.backends.locmem import EmailBackend
+        from users.mail import send_queued_emails
+
+        signup('claimed')
+        send_messages = EmailBackend.send_messages
+        nested = []
+
+        def send_and_poll(backend, messages):
+            nested.append(send_queued_emails())
+            return send_messages(backend, messages)
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', send_and_poll)
+        assert send_queued_emails() == (1, 0)
+        assert nested == [(0, 0)]
+        assert len(outbox) == 1
+
+    def test_failed_message_is_retried_later(self, outbox, monkeypatch):
+        signup('retry')
+
+        def fail(*args, **kwargs):
+            raise OSError('connection reset')
+
+        monkeypatch.setattr(f'{LOCMEM_BACKEND}.send_messages', fail)
+        call_command('send_queued_emails')
+        message = OutgoingEmail.objects.get()
+        assert message.attempts == 1
+        assert message.sent_at is None
+        assert message.next_attempt_at > timezone.now()
+        assert 'connection reset' in message.last_error
+
+        monkeypatch.undo()
+        call_command('send_queued_emails')
+        assert OutgoingEmail.objects.get().attempts == 1
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_queued_emails')
+        message = OutgoingEmail.objects.get()
+        assert message.attempts == 2
+        assert message.sent_at is not None
+        assert len(outbox) == 1
+
+    def test_server_unavailable_releases_batch(self, outbox, monkeypatch):
+        from users.mail import send_queued_emails
+
+        signup('unavailable')
+
+        def fail(*args, **kwargs):
+            raise OSError('connection refused')
+
+        monkeypatch.setattr(f'{LOCMEM_BACKEND}.open', fail)
+        with pytest.raises(OSError):
+            send_queued_emails()
+        message = OutgoingEmail.objects.get()
+        assert message.attempts == 0
+        assert message.next_attempt_at <= timezone.now()
+
+    def test_old_emails_purged(self, outbox, settings):
+        from users.mail import purge_sent_emails
+
+        now = timezone.now()
+        old = now - timedelta(days=settings.EMAIL_QUEUE_KEEP_DAYS + 1)
+        for number, sent_at, attempts in (
+            (1, old, 1), (2, now, 1), (3, None, 0),
+            (4, None, settings.EMAIL_QUEUE_MAX_ATTEMPTS),
+        ):
+            OutgoingEmail.objects.create(
+                subject='Код', body='Код', from_email='admin@yamdb.ru',
+                to=f'user_{number}@yamdb.ru', sent_at=sent_at,
+                attempts=attempts,
+            )
+        OutgoingEmail.objects.filter(to='user_4@yamdb.ru').update(
+            created=old
+        )
+        assert purge_sent_emails() == 2
+        assert sorted(OutgoingEmail.objects.values_list('to', flat=True)) == [
+            'user_2@yamdb.ru', 'user_3@yamdb.ru'
+        ]
@@ -0,0 +1,32 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.mark.django_db
+class TestExplainIndexes:
+    """Планы с индексами и без них строятся только по явному согласию."""
+
+    def test_refused_without_debug(self, make_titles):
+        with pytest.raises(CommandError, match='--i-know'):
+            call_command('explain_indexes')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_plans(self, make_titles, make_reviews, make_comments):
+        from django.db import connection
+
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        make_comments(review, 1)
+        stdout = StringIO()
+        call_command('explain_indexes', i_know=True, stdout=stdout)
+        output = stdout.getvalue()
+        assert output.count('before:') == output.count('after:') == 6
+        assert 'reviews of a title' in output
+        with connection.cursor() as cursor:
+            assert 'review_title_pub_date_idx' in (
+                connection.introspection.get_constraints(
+                    cursor, 'reviews_review'
+                )
+            )
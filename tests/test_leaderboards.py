@@ -0,0 +1,96 @@
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+
+def top(query=''):
+    response = APIClient().get(f'/api/v1/leaderboards/{query}')
+    assert response.status_code == 200, response.content
+    return [(entry['id'], entry['rating'], entry['reviews_count'])
+            for entry in response.json()]
+
+
+def entries():
+    from reviews.models import LeaderboardEntry
+
+    return set(LeaderboardEntry.objects.values_list(
+        'scope', 'title_id', 'rating', 'reviews_count'
+    ))
+
+
+@pytest.mark.django_db
+class TestLeaderboards:
+    """Рейтинги обновляются вместе с отзывами и связями произведений."""
+
+    def test_top_by_rating_and_reviews(self, make_titles, make_review):
+        first, second, third = make_titles(3)
+        make_review(first, 6)
+        make_review(second, 9)
+        make_review(second, 7, 1)
+        assert top() == [(second.id, 8, 2), (first.id, 6, 1)]
+        assert top('?by=reviews') == [(second.id, 8, 2), (first.id, 6, 1)]
+        assert top('?limit=1') == [(second.id, 8, 2)]
+        assert top('?category=movie&by=reviews&limit=1') == [
+            (second.id, 8, 2)
+        ]
+
+    def test_review_changes(self, make_titles, make_review):
+        first, second = make_titles(2)
+        low = make_review(first, 3)
+        make_review(second, 5)
+        assert top() == [(second.id, 5, 1), (first.id, 3, 1)]
+        low.score = 10
+        low.save()
+        assert top() == [(first.id, 10, 1), (second.id, 5, 1)]
+        low.delete()
+        assert top() == [(second.id, 5, 1)]
+
+    def test_genre_and_category_changes(self, make_titles, make_review,
+                                        genres, category):
+        from reviews.models import Category
+
+        first, second = make_titles(2)
+        make_review(first, 8)
+        make_review(second, 4)
+        first.genre.remove(genres[0])
+        assert top('?genre=drama') == [(second.id, 4, 1)]
+        genres[0].titles.add(first)
+        assert top('?genre=drama') == [(first.id, 8, 1), (second.id, 4, 1)]
+        books = Category.objects.create(name='Книги', slug='books')
+        second.category = books
+        second.save()
+        assert top('?category=books') == [(second.id, 4, 1)]
+        assert top('?category=movie') == [(first.id, 8, 1)]
+        category.delete()
+        assert top() == [(first.id, 8, 1), (second.id, 4, 1)]
+        assert ('category:{}'.format(category.id) not in
+                {scope for scope, *_ in entries()})
+
+    def test_rebuild_matches_incremental(self, make_titles, make_review,
+                                         genres):
+        from reviews.models import LeaderboardEntry
+
+        titles = make_titles(3)
+        make_review(titles[0], 7)
+        make_review(titles[1], 2)
+        titles[2].genre.clear()
+        expected = entries()
+        LeaderboardEntry.objects.all().delete()
+        call_command('rebuild_leaderboards', batch_size=2)
+        assert entries() == expected
+
+    def test_single_query(self, make_titles, make_review,
+                          warm_dictionaries, django_assert_num_queries):
+        for number, title in enumerate(make_titles(5)):
+            make_review(title, number + 1)
+        warm_dictionaries()
+        with django_assert_num_queries(1):
+            assert len(top('?genre=comedy&limit=3')) == 3
+
+    @pytest.mark.parametrize('query', (
+        '?by=score', '?limit=0', '?limit=101', '?genre=unknown',
+        '?genre=drama&category=movie',
+    ))
+    def test_invalid_query(self, query, make_titles):
+        response = APIClient().get(f'/api/v1/leaderboards/{query}')
+        assert response.status_code == 400
@@ -0,0 +1,138 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def load(*args, **options):
+    stdout = StringIO()
+    call_command('load_data_files', *args, stdout=stdout, **options)
+    return stdout.getvalue()
+
+
+def counts():
+    from reviews.models import (Category, Comment, Genre, Review, Title,
+                                TitleGenre)
+    from users.models import User
+
+    return {
+        model.__name__: model.objects.count()
+        for model in (Category, Genre, Title, TitleGenre, User, Review,
+                      Comment)
+    }
+
+
+@pytest.mark.django_db
+class TestLoadDataFiles:
+    """Загрузка CSV пачками, с пропуском или обновлением записей."""
+
+    def test_load_all(self, data_dir):
+        from reviews.models import Comment, Review, Title
+
+        output = load(dir=str(data_dir), batch_size=2)
+        assert 'category.csv: created 3, updated 0, skipped 0' in output
+        assert counts() == {
+            'Category': 3, 'Genre': 2, 'Title': 2, 'TitleGenre': 3,
+            'User': 2, 'Review': 2, 'Comment': 2,
+        }
+        review = Review.objects.get(pk=60)
+        assert (review.title_id, review.author_id, review.score) == (
+            30, 50, 8
+        )
+        assert review.text == 'Отзыв, с запятой\nи переносом'
+        assert review.pub_date.isoformat() == '2020-01-01T10:00:00+00:00'
+        assert Comment.objects.get(pk=71).review_id == 61
+        title = Title.objects.get(pk=30)
+        assert (title.reviews_count, title.rating) == (2, 7)
+        assert set(title.genre.values_list('slug', flat=True)) == {
+            'drama', 'comedy'
+        }
+
+    def test_chunked_inserts(self, data_dir):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as context:
+            load(dir=str(data_dir), only=['category'], batch_size=2)
+        inserts = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('INSERT INTO "reviews_category"')
+        ]
+        assert len(inserts) == 2
+
+    def test_skip_and_update_existing(self, data_dir):
+        from reviews.models import Category
+
+        load(dir=str(data_dir), only=['category'])
+        Category.objects.filter(pk=10).update(name='Кино')
+        output = load(dir=str(data_dir), only=['category'])
+        assert 'category.csv: created 0, updated 0, skipped 3' in output
+        assert Category.objects.get(pk=10).name == 'Кино'
+        output = load(dir=str(data_dir), only=['category'],
+                      update_existing=True)
+        assert 'category.csv: created 0, updated 3, skipped 0' in output
+        assert Category.objects.get(pk=10).name == 'Фильм'
+
+    def test_only(self, data_dir):
+        load(dir=str(data_dir), only=['category', 'genre'])
+        assert counts() == {
+            'Category': 3, 'Genre': 2, 'Title': 0, 'TitleGenre': 0,
+            'User': 0, 'Review': 0, 'Comment': 0,
+        }
+
+    def test_missing_file(self, tmp_path):
+        from django.core.management import CommandError
+
+        with pytest.raises(CommandError, match='File not found'):
+            load(dir=str(tmp_path), only=['category'])
+
+    def test_sequences_reset(self, data_dir):
+        from reviews.models import Category, Review
+
+        load(dir=str(data_dir))
+        assert Category.objects.create(name='Игра', slug='game').pk == 13
+        title = Review.objects.get(pk=61).title
+        author = Review.objects.get(pk=60).author
+        Review.objects.filter(pk=60).delete()
+        review = Review.objects.create(
+            title=title, author=author, text='Новый', score=5
+        )
+        assert review.pk == 62
+
+
+def test_dependency_levels():
+    from reviews.management.commands._private import (CSV_SOURCES,
+                                                       dependency_levels)
+
+    assert [
+        {source.name for source in level}
+        for level in dependency_levels(CSV_SOURCES)
+    ] == [
+        {'category', 'genre', 'users'},
+        {'titles'},
+        {'genre_title', 'review'},
+        {'comments'},
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_load(data_dir):
+    """Процессы-загрузчики загружают файлы по уровням зависимостей."""
+    from django.db import connection
+    from reviews.models import Comment, Review, Title
+
+    if connection.vendor != 'postgresql':
+        pytest.skip('SQLite загружается в одном процессе')
+    output = load(dir=str(data_dir), batch_size=1, workers=2)
+    assert 'genre_title.csv: created 3, updated 0, skipped 0' in output
+    assert counts() == {
+        'Category': 3, 'Genre': 2, 'Title': 2, 'TitleGenre': 3,
+        'User': 2, 'Review': 2, 'Comment': 2,
+    }
+    assert set(Review.objects.values_list(
+        'pk', 'title__category__slug', 'author__username'
+    )) == {(60, 'movie', 'reader'), (61, 'movie', 'critic')}
+    assert set(Comment.objects.values_list(
+        'pk', 'review__title_id', 'author__username'
+    )) == {(70, 30, 'critic'), (71, 30, 'reader')}
+    assert Title.objects.get(pk=30).rating == 7
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from rest_framework.test import APIClient
+
+OBSERVE = """
+import django
+django.setup()
+from api.metrics import registry
+registry.observe('TitleViewSet.list', 200, {
+    'duration': 0.01, 'queries': 2, 'db_time': 0.001,
+    'serializer_time': 0.001, 'size': 100,
+})
+"""
+
+
+@pytest.mark.django_db
+class TestMetrics:
+    """Метрики запросов доступны только администратору."""
+
+    def test_anonymous_forbidden(self):
+        response = APIClient().get('/api/v1/metrics/')
+        assert response.status_code == 401
+
+    def test_admin_sees_request_metrics(self, make_titles,
+                                        django_user_model):
+        make_titles(2)
+        APIClient().get('/api/v1/titles/')
+        admin = django_user_model.objects.create(
+            username='metrics_admin', email='metrics@yamdb.ru', role='admin'
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get('/api/v1/metrics/')
+        assert response.status_code == 200
+        body = response.content.decode()
+        assert 'yamdb_request_queries_sum{view="TitleViewSet.list"}' in body
+        assert 'yamdb_request_duration_seconds_bucket' in body
+
+    def test_workers_share_metrics(self, tmp_path, monkeypatch):
+        from api.metrics import registry
+        from django.conf import settings
+
+        environment = {
+            **os.environ,
+            'PYTHONPATH': str(settings.BASE_DIR),
+            'DJANGO_SETTINGS_MODULE': 'api_yamdb.settings',
+            'PROMETHEUS_MULTIPROC_DIR': str(tmp_path),
+        }
+        for _ in range(2):
+            subprocess.run(
+                [sys.executable, '-c', OBSERVE], env=environment, check=True
+            )
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+        body = registry.render()
+        assert (
+            'yamdb_request_queries_sum{view="TitleViewSet.list"} 4.0' in body
+        )
+        assert (
+            'yamdb_requests_total{status="200",view="TitleViewSet.list"} 2.0'
+            in body
+        )
@@ -0,0 +1,115 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+class TestQueryCounts:
+    """Количество SQL-запросов не должно зависеть от размера страницы."""
+
+    @pytest.mark.parametrize('count', (1, 10))
+    def test_titles_list(self, count, make_titles, warm_dictionaries,
+                         django_assert_num_queries):
+        make_titles(count)
+        warm_dictionaries()
+        with django_assert_num_queries(3):
+            response = APIClient().get('/api/v1/titles/')
+        assert len(response.json()['results']) == count
+
+    def test_title_detail(self, make_titles, django_assert_num_queries):
+        title, = make_titles(1)
+        with django_assert_num_queries(2):
+            response = APIClient().get(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize('count', (1, 10))
+    def test_reviews_list(self, count, make_titles, make_reviews,
+                          django_assert_num_queries):
+        title, = make_titles(1)
+        make_reviews(title, count)
+        with django_assert_num_queries(3):
+            response = APIClient().get(f'/api/v1/titles/{title.id}/reviews/')
+        results = response.json()['results']
+        assert len(results) == count
+        assert results[0]['author'].startswith('author_')
+
+    @pytest.mark.parametrize('count', (1, 10))
+    def test_comments_list(self, count, make_titles, make_reviews,
+                           make_comments, django_assert_num_queries):
+        title, = make_titles(1)
+        review, = make_reviews(title, 1)
+        make_comments(review, count)
+        with django_assert_num_queries(3):
+            response = APIClient().get(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            )
+        results = response.json()['results']
+        assert len(results) == count
+        assert results[0]['author'] == review.author.username
+
+    def test_reviews_cursor_pagination(self, make_titles, make_reviews,
+                                       django_assert_num_queries):
+        title, = make_titles(1)
+        make_reviews(title, 15)
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        with django_assert_num_queries(2):
+            first_page = APIClient().get(url).json()
+        assert 'count' not in first_page
+        second_page = APIClient().get(first_page['next']).json()
+        ids = [review['id'] for review in first_page['results']]
+        ids += [review['id'] for review in second_page['results']]
+        assert len(set(ids)) == 15
+        assert second_page['next'] is None
+
+    def test_categories_list_cached(self, category, django_assert_num_queries):
+        from reviews.models import Category
+        APIClient().get('/api/v1/categories/')
+        with django_assert_num_queries(0):
+            response = APIClient().get('/api/v1/categories/')
+        assert response.json()['results'] == [
+            {'name': category.name, 'slug': category.slug}
+        ]
+        Category.objects.create(name='Книга', slug='book')
+        response = APIClient().get('/api/v1/categories/')
+        assert response.json()['count'] == 2
+
+    def test_dictionary_reloaded_after_commit(
+            self, category, django_capture_on_commit_callbacks):
+        from django.core.cache import cache
+        from reviews.cache import categories, get_version
+        from reviews.models import Category
+
+        stale = list(Category.objects.all())
+        with django_capture_on_commit_callbacks(execute=True):
+            Category.objects.create(name='Книга', slug='book')
+            version = get_version('reviews.category')
+            cache.set(f'dictionary:reviews.category:{version}', stale)
+            assert len(categories.all()) == 1
+        assert get_version('reviews.category') != version
+        assert len(categories.all()) == 2
+
+    def test_stale_dictionary_reloaded(self, make_titles, category,
+                                       django_user_model):
+        from django.core.cache import cache
+        from reviews.cache import categories, genres, get_version
+
+        title, = make_titles(1)
+        for dictionary in (categories, genres):
+            version = get_version(dictionary.name)
+            cache.set(f'dictionary:{dictionary.name}:{version}', [])
+            dictionary._local = (None, [], {}, {})
+        response = APIClient().get('/api/v1/titles/')
+        assert response.status_code == 200
+        result, = response.json()['results']
+        assert result['category']['slug'] == category.slug
+        assert len(result['genre']) == title.genre.count()
+        categories._local = (categories._local[0], [], {}, {})
+        admin = django_user_model.objects.create(
+            username='stale_admin', email='stale_admin@yamdb.fake',
+            role='admin',
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.patch(
+            f'/api/v1/titles/{title.id}/', {'category': category.slug}
+        )
+        assert response.status_code == 200
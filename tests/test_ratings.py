@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+from rest_framework.test import APIClient
+
+
+def stored(title):
+    title.refresh_from_db()
+    return title.reviews_count, title.score_sum, title.rating
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.mark.django_db
+class TestStoredRating:
+    """Хранимый рейтинг меняется вместе с отзывами."""
+
+    def test_api(self, make_titles, make_review, django_user_model):
+        title, = make_titles(1)
+        first = make_review(title, 4)
+        assert stored(title) == (1, 4, 4)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        client = client_for(django_user_model.objects.create(
+            username='rater', email='rater@yamdb.fake'
+        ))
+        response = client.post(url, {'text': 'Отзыв', 'score': 8})
+        assert response.status_code == 201
+        assert stored(title) == (2, 12, 6)
+        response = client_for(first.author).patch(
+            f'{url}{first.id}/', {'score': 10}
+        )
+        assert response.status_code == 200
+        assert stored(title) == (2, 18, 9)
+        response = client_for(first.author).delete(f'{url}{first.id}/')
+        assert response.status_code == 204
+        assert stored(title) == (1, 8, 8)
+        assert APIClient().get(f'/api/v1/titles/{title.id}/').json()[
+            'rating'
+        ] == 8
+
+    def test_stale_copies(self, make_titles, make_review):
+        from reviews.models import Review
+
+        title, = make_titles(1)
+        review = make_review(title, 3)
+        first, second = Review.objects.get(), Review.objects.get()
+        first.score = 7
+        first.save()
+        second.score = 5
+        second.save()
+        assert stored(title) == (1, 5, 5)
+        first.delete()
+        second.delete()
+        assert stored(title) == (0, 0, None)
+        assert not Review.objects.filter(pk=review.pk).exists()
+
+    def test_rebuild_command(self, make_titles, make_review):
+        from django.core.management import call_command
+        from reviews.models import Title
+
+        title, = make_titles(1)
+        make_review(title, 6)
+        make_review(title, 2, 1)
+        url = f'/api/v1/titles/{title.id}/'
+        etag = APIClient().get(url)['ETag']
+        Title.objects.update(reviews_count=0, score_sum=0, rating=None)
+        call_command('rebuild_ratings')
+        assert stored(title) == (2, 8, 4)
+        response = APIClient().get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()['rating'] == 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_edit_and_delete(make_titles, make_review):
+    """
+    Удаление ждёт блокировку строки, которую держит правка оценки,
+    и вычитает уже новую оценку.
+    """
+    from django.db import connection, transaction
+    from reviews.models import Review
+
+    if connection.vendor != 'postgresql':
+        pytest.skip('Блокировки строк есть только у PostgreSQL')
+    title, = make_titles(1)
+    review = make_review(title, 3)
+    editing, deleting = Review.objects.get(), Review.objects.get()
+    edited = threading.Event()
+    errors = []
+
+    def edit():
+        try:
+            with transaction.atomic():
+                editing.score = 7
+                editing.save()
+                edited.set()
+                threading.Event().wait(0.2)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            edited.set()
+            connection.close()
+
+    thread = threading.Thread(target=edit)
+    thread.start()
+    edited.wait()
+    deleting.delete()
+    thread.join()
+    assert not errors
+    assert not Review.objects.filter(pk=review.pk).exists()
+    title.refresh_from_db()
+    assert stored(title) == (0, 0, None)
+    assert not any(title.score_counts.values())
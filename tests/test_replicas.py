@@ -0,0 +1,130 @@
+import pytest
+from api.authentication import access_token_for
+from api.replicas import ReplicaRouter
+from rest_framework.test import APIClient
+
+
+replica_lag = []
+
+
+@pytest.fixture
+def routed(settings, monkeypatch):
+    """
+    Псевдонимы, выбранные маршрутизатором для чтения.
+    Сами запросы идут в тестовую базу: реплика в тестах — её зеркало,
+    отставание которого задаётся replica_lag.
+    """
+    settings.DATABASE_REPLICAS = ['replica_1']
+    monkeypatch.setattr('reviews.cache.primary_position', lambda: '0/2')
+    monkeypatch.setattr(
+        'api.replicas.replica_caught_up',
+        lambda alias, position: not replica_lag,
+    )
+    replica_lag.clear()
+    aliases = []
+    db_for_read = ReplicaRouter.db_for_read
+
+    def record(self, model, **hints):
+        aliases.append(db_for_read(self, model, **hints))
+
+    monkeypatch.setattr(ReplicaRouter, 'db_for_read', record)
+    return aliases
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}'
+    )
+    return client
+
+
+@pytest.fixture
+def author(django_user_model):
+    return django_user_model.objects.create(
+        username='replica_author', email='replica_author@yamdb.ru'
+    )
+
+
+@pytest.mark.django_db
+class TestReplicaRouting:
+    """Безопасные запросы каталога читают с реплики."""
+
+    def test_reads_from_replica(self, routed, make_titles):
+        title, = make_titles(1)
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{title.id}/',
+                    f'/api/v1/titles/{title.id}/reviews/'):
+            routed.clear()
+            assert APIClient().get(url).status_code == 200
+            assert routed and set(routed) == {'replica_1'}
+
+    def test_writes_and_auth_use_primary(self, routed, author, make_titles):
+        title, = make_titles(1)
+        response = client_for(author).post(
+            f'/api/v1/titles/{title.id}/reviews/', {'text': 'Да', 'score': 5}
+        )
+        assert response.status_code == 201
+        response = client_for(author).get('/api/v1/users/me/')
+        assert response.status_code == 200
+        APIClient().post('/api/v1/auth/signup/', {
+            'username': 'replica_new', 'email': 'replica_new@yamdb.ru'
+        })
+        assert routed and set(routed) == {None}
+
+    def test_author_pinned_to_primary_after_write(self, routed, author,
+                                                  make_titles,
+                                                  django_user_model):
+        title, = make_titles(1)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        client_for(author).post(url, {'text': 'Да', 'score': 5})
+        routed.clear()
+        assert client_for(author).get(url).data['count'] == 1
+        assert set(routed) == {'default'}
+        other = django_user_model.objects.create(
+            username='replica_other', email='replica_other@yamdb.ru'
+        )
+        routed.clear()
+        assert client_for(other).get(url).status_code == 200
+        assert set(routed) == {'replica_1'}
+
+    def test_without_replicas(self, routed, settings, make_titles):
+        settings.DATABASE_REPLICAS = []
+        make_titles(1)
+        assert APIClient().get('/api/v1/titles/').status_code == 200
+        assert set(routed) == {None}
+
+    def test_lagging_replica_skipped(self, routed, make_titles):
+        title, = make_titles(1)
+        url = f'/api/v1/titles/{title.id}/'
+        replica_lag.append(True)
+        routed.clear()
+        assert APIClient().get(url).status_code == 200
+        assert set(routed) == {'default'}
+        replica_lag.clear()
+        title.name = 'Новое название'
+        title.save()
+        routed.clear()
+        assert APIClient().get(url).json()['name'] == 'Новое название'
+        assert set(routed) == {'replica_1'}
+
+    def test_unknown_position_reads_primary(self, routed, make_titles):
+        from django.core.cache import cache
+
+        make_titles(1)
+        cache.clear()
+        routed.clear()
+        assert APIClient().get('/api/v1/titles/').status_code == 200
+        assert routed and set(routed) == {'default'}
+
+
+@pytest.mark.django_db
+def test_wal_positions():
+    from django.db import connection
+
+    from api_yamdb.db.replication import primary_position, replica_caught_up
+
+    if connection.vendor != 'postgresql':
+        pytest.skip('Позиции журнала есть только у PostgreSQL')
+    position = primary_position()
+    assert '/' in position
+    assert replica_caught_up('default', position)
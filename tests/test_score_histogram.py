@@ -0,0 +1,136 @@
+import threading
+
+import pytest
+from rest_framework.test import APIClient
+
+
+def histogram(**counts):
+    return {str(score): counts.get(f's{score}', 0) for score in range(1, 11)}
+
+
+def stored(title):
+    title.refresh_from_db()
+    return {str(score): count for score, count in title.score_counts.items()}
+
+
+@pytest.mark.django_db
+class TestScoreHistogram:
+    """Счётчики оценок меняются вместе с отзывами."""
+
+    def test_review_changes(self, make_titles, make_review):
+        first, second = make_titles(2)
+        changed = make_review(first, 3)
+        make_review(first, 3, 1)
+        make_review(first, 10, 2)
+        assert stored(first) == histogram(s3=2, s10=1)
+        changed.score = 7
+        changed.save()
+        assert stored(first) == histogram(s3=1, s7=1, s10=1)
+        changed.title = second
+        changed.save()
+        assert stored(first) == histogram(s3=1, s10=1)
+        assert stored(second) == histogram(s7=1)
+        changed.delete()
+        assert stored(second) == histogram()
+
+    def test_stale_copies(self, make_titles, make_review):
+        from reviews.models import Review
+
+        title, = make_titles(1)
+        changed = make_review(title, 3)
+        make_review(title, 3, 1)
+        first = Review.objects.get(pk=changed.pk)
+        second = Review.objects.get(pk=changed.pk)
+        first.score = 9
+        first.save()
+        second.score = 1
+        second.save()
+        assert stored(title) == histogram(s1=1, s3=1)
+        first.delete()
+        second.delete()
+        assert stored(title) == histogram(s3=1)
+
+    def test_rebuild_matches_incremental(self, make_titles, make_review):
+        from reviews.models import Title
+
+        first, second = make_titles(2)
+        make_review(first, 1)
+        make_review(first, 5, 1)
+        make_review(second, 5)
+        expected = stored(first), stored(second)
+        Title.objects.update(score_1_count=0, score_5_count=7)
+        Title.objects.rebuild_ratings()
+        assert (stored(first), stored(second)) == expected
+
+    def test_title_detail(self, make_titles, make_review,
+                          django_assert_num_queries):
+        title, = make_titles(1)
+        make_review(title, 8)
+        response = APIClient().get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['scores'] == histogram(s8=1)
+        with django_assert_num_queries(1) as context:
+            response = APIClient().get(
+                f'/api/v1/titles/{title.id}/?fields=scores'
+            )
+        assert response.json() == {'scores': histogram(s8=1)}
+        assert 'description' not in context.captured_queries[0]['sql']
+        response = APIClient().get('/api/v1/titles/')
+        assert 'scores' not in response.json()['results'][0]
+
+    def test_batch(self, make_titles, make_review, django_assert_num_queries):
+        first, second, third = make_titles(3)
+        make_review(first, 2)
+        make_review(third, 9)
+        with django_assert_num_queries(1):
+            response = APIClient().get(
+                f'/api/v1/titles/scores/?ids={third.id},{first.id},'
+                f'{second.id},{third.id + 100}'
+            )
+        assert response.status_code == 200
+        assert response.json() == [
+            {'id': first.id, 'scores': histogram(s2=1)},
+            {'id': second.id, 'scores': histogram()},
+            {'id': third.id, 'scores': histogram(s9=1)},
+        ]
+
+    @pytest.mark.parametrize('query', (
+        '', '?ids=', '?ids=1,a', ','.join(['?ids=0'] + [
+            str(pk) for pk in range(1, 101)
+        ]),
+    ))
+    def test_batch_invalid(self, query):
+        response = APIClient().get(f'/api/v1/titles/scores/{query}')
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_edits(make_titles, make_review):
+    """Вторая правка ждёт первую и переносит уже новую оценку."""
+    from django.db import connection, transaction
+    from reviews.models import Review
+
+    if connection.vendor != 'postgresql':
+        pytest.skip('Блокировки строк есть только у PostgreSQL')
+    title, = make_titles(1)
+    make_review(title, 3)
+    first, second = Review.objects.get(), Review.objects.get()
+    edited = threading.Event()
+
+    def edit():
+        try:
+            with transaction.atomic():
+                first.score = 9
+                first.save()
+                edited.set()
+                threading.Event().wait(0.2)
+        finally:
+            edited.set()
+            connection.close()
+
+    thread = threading.Thread(target=edit)
+    thread.start()
+    edited.wait()
+    second.score = 1
+    second.save()
+    thread.join()
+    assert stored(title) == histogram(s1=1)
@@ -0,0 +1,56 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+def found(query):
+    response = APIClient().get('/api/v1/titles/', {'search': query})
+    assert response.status_code == 200
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.fixture
+def titles(category):
+    from reviews.models import Title
+
+    return [
+        Title.objects.create(
+            name=name, description=description, year=2000, category=category
+        )
+        for name, description in (
+            ('Star Trek', 'The crew explores distant space'),
+            ('Space', 'A documentary series'),
+            ('Gardener', 'About flowers'),
+            ('Космос', 'Путешествие к звёздам'),
+        )
+    ]
+
+
+@pytest.mark.django_db
+class TestSearch:
+    """Поиск по названию и описанию произведений."""
+
+    def test_ranked(self, titles):
+        from django.db import connection
+
+        if connection.vendor != 'postgresql':
+            pytest.skip('Полнотекстовый поиск есть только у PostgreSQL')
+        assert found('space') == ['Space', 'Star Trek']
+        assert found('spaces') == ['Space', 'Star Trek']
+        assert found('crew explored') == ['Star Trek']
+        assert found('space -crew') == ['Space']
+        assert found('roses') == []
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW server_encoding')
+            if cursor.fetchone()[0] == 'UTF8':
+                assert found('космосе') == ['Космос']
+
+    def test_substring_fallback(self, titles, monkeypatch):
+        from reviews.models import TitleQuerySet
+
+        monkeypatch.setattr(
+            TitleQuerySet, 'supports_full_text_search', lambda self: False
+        )
+        assert set(found('pac')) == {'Space', 'Star Trek'}
+        assert found('flowers') == ['Gardener']
+        assert found('осмо') == ['Космос']
+        assert found('spaces') == []
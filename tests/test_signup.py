@@ -0,0 +1,48 @@
+import pytest
+from rest_framework.test import APIClient
+from users.models import User
+
+EMAIL_TAKEN = 'Пользователь с этой почтой уже существует.'
+
+
+def signup(username, email):
+    return APIClient().post(
+        '/api/v1/auth/signup/', {'username': username, 'email': email}
+    )
+
+
+@pytest.mark.django_db
+class TestSignup:
+    """Регистрация обходится одним запросом на проверку совпадений."""
+
+    def test_new_user_queries(self, django_assert_num_queries):
+        # Поиск совпадений, вставка пользователя и письма
+        # и SAVEPOINT/RELEASE вокруг вставки внутри тестовой транзакции.
+        with django_assert_num_queries(5):
+            response = signup('newcomer', 'newcomer@yamdb.ru')
+        assert response.status_code == 200
+        assert User.objects.filter(username='newcomer').exists()
+
+    def test_existing_user_queries(self, django_assert_num_queries):
+        User.objects.create(username='invited', email='invited@yamdb.ru')
+        with django_assert_num_queries(2):
+            response = signup('invited', 'invited@yamdb.ru')
+        assert response.status_code == 200
+        assert User.objects.count() == 1
+
+    @pytest.mark.parametrize('username,email', (
+        ('owner', 'other@yamdb.ru'),
+        ('other', 'owner@yamdb.ru'),
+    ))
+    def test_conflicts(self, username, email):
+        User.objects.create(username='owner', email='owner@yamdb.ru')
+        response = signup(username, email)
+        assert response.status_code == 400
+        assert response.json() == {'non_field_errors': [EMAIL_TAKEN]}
+
+    def test_me_forbidden(self):
+        response = signup('me', 'me@yamdb.ru')
+        assert response.status_code == 400
+        assert response.json() == {
+            'non_field_errors': ['Нельзя использовать "me" как имя.']
+        }
@@ -0,0 +1,112 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+
+@pytest.fixture(params=(True, False), ids=('values', 'regular'))
+def values_list(request, settings):
+    settings.VALUES_LIST = request.param
+    return request.param
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+    """?fields и ?omit сужают и ответ, и запрос к базе."""
+
+    def test_titles_fields(self, values_list, make_titles, make_reviews,
+                           django_assert_num_queries):
+        title, _ = make_titles(2)
+        make_reviews(title, 2)
+        with django_assert_num_queries(2) as context:
+            response = APIClient().get(
+                '/api/v1/titles/?fields=id,name,rating'
+            )
+        assert response.status_code == 200
+        result = response.json()['results'][0]
+        assert list(result) == ['id', 'name', 'rating']
+        assert result['rating'] == 1
+        sql = context.captured_queries[-1]['sql']
+        assert 'description' not in sql and 'JOIN' not in sql
+
+    def test_titles_omit(self, values_list, make_titles, warm_dictionaries,
+                         django_assert_num_queries):
+        make_titles(2)
+        warm_dictionaries()
+        with django_assert_num_queries(2):
+            response = APIClient().get(
+                '/api/v1/titles/?omit=description,genre'
+            )
+        assert list(response.json()['results'][0]) == [
+            'id', 'name', 'year', 'rating', 'category'
+        ]
+        assert response.json()['results'][0]['category']['slug'] == 'movie'
+
+    def test_title_detail(self, make_titles, django_assert_num_queries):
+        title, = make_titles(1)
+        with django_assert_num_queries(1):
+            response = APIClient().get(
+                f'/api/v1/titles/{title.id}/?fields=name,year'
+            )
+        assert response.json() == {'name': title.name, 'year': title.year}
+        with django_assert_num_queries(2) as context:
+            response = APIClient().get(
+                f'/api/v1/titles/{title.id}/?fields=name,genre'
+            )
+        assert response.json() == {
+            'name': title.name,
+            'genre': [
+                {'name': 'Драма', 'slug': 'drama'},
+                {'name': 'Комедия', 'slug': 'comedy'},
+            ],
+        }
+        assert 'JOIN' not in context.captured_queries[0]['sql']
+
+    @pytest.mark.parametrize('pagination', ('page', 'cursor'))
+    def test_reviews_without_author(self, values_list, pagination,
+                                    make_titles, make_reviews,
+                                    django_assert_num_queries):
+        title, = make_titles(1)
+        make_reviews(title, 3)
+        url = (
+            f'/api/v1/titles/{title.id}/reviews/'
+            f'?fields=id,score&pagination={pagination}'
+        )
+        queries = 3 if pagination == 'page' else 2
+        with django_assert_num_queries(queries) as context:
+            response = APIClient().get(url)
+        results = response.json()['results']
+        assert [list(result) for result in results] == [['id', 'score']] * 3
+        assert 'JOIN' not in context.captured_queries[-1]['sql']
+
+    def test_same_bytes_on_both_paths(self, settings, make_titles,
+                                      make_reviews):
+        title, = make_titles(1)
+        make_reviews(title, 2)
+        for url in ('/api/v1/titles/?fields=name,category,genre',
+                    f'/api/v1/titles/{title.id}/reviews/?omit=text'):
+            contents = []
+            for values_list in (False, True):
+                settings.VALUES_LIST = values_list
+                cache.clear()
+                contents.append(APIClient().get(url).content)
+            assert contents[0] == contents[1]
+
+    def test_unknown_field(self, make_titles):
+        response = APIClient().get('/api/v1/titles/?fields=id,secret')
+        assert response.status_code == 400
+        response = APIClient().get('/api/v1/titles/?omit=id,secret')
+        assert response.status_code == 400
+
+    def test_writes_ignore_fields(self, make_titles, django_user_model):
+        title, = make_titles(1)
+        user = django_user_model.objects.create(
+            username='sparse', email='sparse@yamdb.ru'
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post(
+            f'/api/v1/titles/{title.id}/reviews/?fields=id',
+            {'text': 'Отзыв', 'score': 7},
+        )
+        assert response.status_code == 201
+        assert response.json()['score'] == 7
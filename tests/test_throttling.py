@@ -0,0 +1,141 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+import pytest
+from api.throttling import SlidingWindowThrottle
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {
+                **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+                **rates,
+            },
+        }
+    return set_rates
+
+
+def signup(number):
+    return APIClient().post('/api/v1/auth/signup/', {
+        'username': f'user_{number}', 'email': f'user_{number}@yamdb.ru'
+    })
+
+
+@pytest.mark.django_db
+class TestThrottling:
+    """Изменяющие запросы ограничиваются, чтение — нет."""
+
+    def test_signup_limited_with_retry_after(self, rates):
+        rates(signup='2/min')
+        assert signup(1).status_code == 200
+        assert signup(2).status_code == 200
+        response = signup(3)
+        assert response.status_code == 429
+        assert 1 <= int(response['Retry-After']) <= 120
+
+    def test_limit_disabled(self, rates):
+        rates(signup=None)
+        for number in range(5):
+            assert signup(number).status_code == 200
+
+    def test_reads_not_limited(self, rates, make_titles, make_reviews):
+        rates(reviews='1/min')
+        title, = make_titles(1)
+        make_reviews(title, 1)
+        client = APIClient()
+        for _ in range(3):
+            response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+            assert response.status_code == 200
+
+    def test_review_writes_limited_per_user(self, rates, make_titles,
+                                            django_user_model):
+        rates(reviews='1/min')
+        first, second = make_titles(2)
+        author = django_user_model.objects.create(
+            username='writer', email='writer@yamdb.ru'
+        )
+        client = APIClient()
+        client.force_authenticate(author)
+        data = {'text': 'Отзыв', 'score': 7}
+        url = '/api/v1/titles/{}/reviews/'
+        assert client.post(url.format(first.id), data).status_code == 201
+        assert client.post(url.format(second.id), data).status_code == 429
+
+        other = django_user_model.objects.create(
+            username='other', email='other@yamdb.ru'
+        )
+        client.force_authenticate(other)
+        assert client.post(url.format(second.id), data).status_code == 201
+
+
+@pytest.mark.parametrize('elapsed,previous,current,allowed', (
+    (0, 10, 0, False),
+    (30, 10, 4, True),
+    (30, 10, 5, False),
+    (59, 10, 9, True),
+    (0, 0, 10, False),
+))
+def test_sliding_window_estimate(monkeypatch, elapsed, previous, current,
+                                 allowed):
+    throttle = SlidingWindowThrottle()
+    throttle.scope = 'token'
+    throttle.THROTTLE_RATES = {'token': '10/min'}
+    monkeypatch.setattr(throttle, 'get_cache_key', lambda *args: 'key')
+    monkeypatch.setattr(throttle, 'timer', lambda: 60 * 1000 + elapsed)
+    throttle.cache.set_many({'key_1000': current, 'key_999': previous})
+    request = type('Request', (), {'method': 'POST'})
+    assert throttle.allow_request(request, None) is allowed
+    if not allowed:
+        assert throttle.wait() >= 1
+
+
+class SlowReads:
+    """Кэш, ответ которого приходит не сразу, как по сети."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.cache, name)
+
+    def get(self, *args, **kwargs):
+        value = self.cache.get(*args, **kwargs)
+        time.sleep(0.01)
+        return value
+
+    def get_many(self, *args, **kwargs):
+        values = self.cache.get_many(*args, **kwargs)
+        time.sleep(0.01)
+        return values
+
+
+def test_concurrent_requests_counted_once(monkeypatch):
+    requests = 20
+    barrier = Barrier(requests)
+    cache = SlidingWindowThrottle.cache
+    cache.delete('concurrent_1000')
+    monkeypatch.setattr(SlidingWindowThrottle, 'cache', SlowReads(cache))
+    monkeypatch.setattr(SlidingWindowThrottle, 'timer', lambda self: 60000)
+    monkeypatch.setattr(
+        SlidingWindowThrottle, 'get_cache_key',
+        lambda self, *args: 'concurrent',
+    )
+
+    def request(_):
+        throttle = SlidingWindowThrottle()
+        throttle.scope = 'token'
+        throttle.THROTTLE_RATES = {'token': '5/min'}
+        barrier.wait()
+        return throttle.allow_request(
+            type('Request', (), {'method': 'POST'}), None
+        )
+
+    with ThreadPoolExecutor(requests) as executor:
+        allowed = list(executor.map(request, range(requests)))
+    assert allowed.count(True) == 5
+    assert cache.get('concurrent_1000') == 5
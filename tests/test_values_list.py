@@ -0,0 +1,98 @@
+import datetime
+from collections import OrderedDict
+from decimal import Decimal
+
+import pytest
+from api.renderers import FastJSONRenderer
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def catalogue(make_titles, make_reviews, make_comments):
+    from reviews.models import Title
+
+    titles = make_titles(11)
+    titles[1].genre.set(titles[1].genre.order_by('-pk')[:1])
+    Title.objects.create(name='Без категории', year=1999)
+    review, *_ = make_reviews(titles[0], 3)
+    review.text = 'Строка с разделителем \u2028 и \u2029'
+    review.save()
+    make_comments(review, 2)
+    return titles[0], review
+
+
+def get_both(settings, url):
+    """Ответы обычной сериализации и сериализации по .values()."""
+    contents = []
+    for values_list in (False, True):
+        settings.VALUES_LIST = values_list
+        cache.clear()
+        response = APIClient().get(url)
+        assert response.status_code == 200
+        contents.append(response.content)
+    return contents
+
+
+@pytest.mark.django_db
+class TestValuesList:
+    """Быстрый list отдаёт те же байты, что и обычные сериализаторы."""
+
+    @pytest.mark.parametrize('query', (
+        '', '?genre=drama', '?category=movie', '?name=произв', '?year=2000',
+        '?search=Произведение', '?page=2',
+    ))
+    def test_titles(self, settings, catalogue, query):
+        regular, values = get_both(settings, f'/api/v1/titles/{query}')
+        assert regular == values
+
+    @pytest.mark.parametrize('query', ('', '?pagination=cursor'))
+    def test_reviews_and_comments(self, settings, catalogue, query):
+        title, review = catalogue
+        for url in (f'/api/v1/titles/{title.id}/reviews/',
+                    f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+                    'comments/'):
+            regular, values = get_both(settings, url + query)
+            assert regular == values
+
+    def test_rating_and_empty_relations(self, settings, catalogue):
+        regular, values = get_both(settings, '/api/v1/titles/?page=2')
+        assert regular == values
+        assert b'"rating":null' in values and b'"category":null' in values
+        assert b'"rating":2,' in get_both(settings, '/api/v1/titles/')[1]
+        assert b'\\u2028' in get_both(
+            settings, f'/api/v1/titles/{catalogue[0].id}/reviews/'
+        )[1]
+
+
+class TestFastJSONRenderer:
+    """FastJSONRenderer совпадает с JSONRenderer побайтно."""
+
+    data = OrderedDict((
+        ('text', 'Текст и «кавычки» "escape" \\ </script>'),
+        ('lazy', gettext_lazy('Not found.')),
+        ('number', 10),
+        ('float', 1.5),
+        ('decimal', Decimal('1.10')),
+        ('date', datetime.datetime(2023, 1, 2, 3, 4, 5, 678901)),
+        ('none', None),
+        ('nested', [{'a': True, 1: 'ключ'}]),
+    ))
+
+    def test_same_output(self):
+        assert (
+            FastJSONRenderer().render(self.data)
+            == JSONRenderer().render(self.data)
+        )
+
+    def test_indent(self):
+        context = {'indent': 4}
+        assert (
+            FastJSONRenderer().render(self.data, renderer_context=context)
+            == JSONRenderer().render(self.data, renderer_context=context)
+        )
+
+    def test_empty(self):
+        assert FastJSONRenderer().render(None) == b''
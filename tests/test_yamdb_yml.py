@@ -48,3 +48,17 @@ class TestWorkflow:
             'Проверьте, что настроили отправку telegram сообщения '
             f'в файл {filename}'
         )
+
+    def test_github_workflow_in_sync(self):
+        def jobs_before_deploy(path):
+            with open(path) as f:
+                workflow = f.read()
+            return workflow.split('jobs:', 1)[1].split('\n  deploy:')[0]
+
+        github = jobs_before_deploy(
+            os.path.join(root_dir, '.github', 'workflows', 'yamdb_workflow.yml')
+        )
+        assert 'memcached' in github and 'CACHE_LOCATION' in github
+        assert github == jobs_before_deploy(
+            os.path.join(root_dir, 'yamdb_workflow.yml')
+        )